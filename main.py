@@ -1,16 +1,21 @@
 """
 Main entry point for the Smart Home Expense & Maintenance Analyst Agent
 """
+import sys
+
 import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
 from contextlib import asynccontextmanager
 
 from smart_home_agent.core.config import settings
 from smart_home_agent.core.database import init_db
 from smart_home_agent.api.routes import api_router
 from smart_home_agent.api.middleware import setup_middleware
-from smart_home_agent.utils.logger import setup_logging
+from smart_home_agent.agent import SmartHomeAgent
+from smart_home_agent.utils.logger import setup_logging, shutdown_logging
 
 
 @asynccontextmanager
@@ -19,9 +24,10 @@ async def lifespan(app: FastAPI):
     # Startup
     setup_logging()
     await init_db()
+    app.state.smart_home_agent = SmartHomeAgent()
     yield
     # Shutdown
-    pass
+    shutdown_logging()
 
 
 def create_app() -> FastAPI:
@@ -32,6 +38,7 @@ def create_app() -> FastAPI:
         version="1.0.0",
         docs_url="/docs" if settings.DEBUG else None,
         redoc_url="/redoc" if settings.DEBUG else None,
+        default_response_class=ORJSONResponse,
         lifespan=lifespan
     )
 
@@ -44,6 +51,9 @@ def create_app() -> FastAPI:
         allow_headers=["*"],
     )
 
+    # Compress larger JSON bodies (bill lists, summaries)
+    app.add_middleware(GZipMiddleware, minimum_size=500)
+
     # Custom middleware
     setup_middleware(app)
 
@@ -62,5 +72,9 @@ if __name__ == "__main__":
         host="0.0.0.0",
         port=8000,
         reload=settings.DEBUG,
-        log_level=settings.LOG_LEVEL.lower()
+        log_level=settings.LOG_LEVEL.lower(),
+        # uvloop is not available on Windows
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools",
+        workers=settings.WORKERS
     )
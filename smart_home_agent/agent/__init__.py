@@ -1,14 +1,13 @@
 """
 Agent package for LangGraph-based Smart Home Assistant
 """
-from .graph import smart_home_agent, SmartHomeAgent
+from .graph import SmartHomeAgent
 from .state import AgentState, session_manager
-from .intent_parser import intent_parser
+from .intent_parser import IntentParser
 
 __all__ = [
-    "smart_home_agent",
-    "SmartHomeAgent", 
+    "SmartHomeAgent",
     "AgentState",
     "session_manager",
-    "intent_parser"
+    "IntentParser"
 ]
@@ -2,10 +2,16 @@
 LangGraph workflow orchestration for the Smart Home Agent
 """
 from langgraph.graph import StateGraph, END, START
-from typing import Literal
+from langchain_core.messages import HumanMessage
+from langchain_core.messages.utils import trim_messages
+from functools import lru_cache
+from typing import Optional
+from sqlalchemy.orm import Session
 import logging
 
+from smart_home_agent.core.config import settings
 from .state import AgentState
+from .intent_parser import IntentParser
 from .nodes import (
     input_node,
     add_bill_node,
@@ -19,95 +25,75 @@ from .nodes import (
 logger = logging.getLogger(__name__)
 
 
-def determine_action(state: AgentState) -> Literal["add_bill", "query_expenses", "get_summary", "list_upcoming", "get_statistics", "response"]:
-    """Determine which action node to execute based on intent"""
-    intent = state.get("current_intent")
+@lru_cache(maxsize=None)
+def _build_compiled_graph():
+    """Build and compile the LangGraph workflow
 
-    if intent == "add_bill":
-        return "add_bill"
-    elif intent == "query_expenses":
-        return "query_expenses"
-    elif intent == "get_summary":
-        return "get_summary"
-    elif intent == "list_upcoming":
-        return "list_upcoming"
-    elif intent == "get_statistics":
-        return "get_statistics"
-    else:
-        # For greetings, general questions, or unrecognized intents
-        return "response"
+    Compiled once per process; every SmartHomeAgent shares the result.
+    Node functions hold no per-agent state, so sharing is safe.
+    """
+    # Initialize the graph
+    workflow = StateGraph(AgentState)
 
+    # Add nodes
+    workflow.add_node("input", input_node)
+    workflow.add_node("add_bill", add_bill_node)
+    workflow.add_node("query_expenses", query_expenses_node)
+    workflow.add_node("get_summary", get_summary_node)
+    workflow.add_node("list_upcoming", list_upcoming_node)
+    workflow.add_node("get_statistics", get_statistics_node)
+    workflow.add_node("response", response_node)
 
-class SmartHomeAgent:
-    """Main agent class that orchestrates the workflow"""
+    # Set entry point
+    workflow.set_entry_point("input")
 
-    def __init__(self):
-        self.graph = self._build_graph()
-
-    def _build_graph(self) -> StateGraph:
-        """Build the LangGraph workflow"""
-        # Initialize the graph
-        workflow = StateGraph(AgentState)
-
-        # Add nodes
-        workflow.add_node("input", input_node)
-        workflow.add_node("add_bill", add_bill_node)
-        workflow.add_node("query_expenses", query_expenses_node)
-        workflow.add_node("get_summary", get_summary_node)
-        workflow.add_node("list_upcoming", list_upcoming_node)
-        workflow.add_node("get_statistics", get_statistics_node)
-        workflow.add_node("response", response_node)
-
-        # Set entry point
-        workflow.set_entry_point("input")
-
-        # Add conditional edges from input to action nodes
-        workflow.add_conditional_edges(
-            "input",
-            determine_action,
-            {
-                "add_bill": "add_bill",
-                "query_expenses": "query_expenses",
-                "get_summary": "get_summary",
-                "list_upcoming": "list_upcoming",
-                "get_statistics": "get_statistics",
-                "response": "response"
-            }
-        )
+    # input_node and the action nodes route themselves via Command(goto=...)
 
-        # All action nodes lead to response
-        workflow.add_edge("add_bill", "response")
-        workflow.add_edge("query_expenses", "response")
-        workflow.add_edge("get_summary", "response")
-        workflow.add_edge("list_upcoming", "response")
-        workflow.add_edge("get_statistics", "response")
+    # Response is the end
+    workflow.add_edge("response", END)
 
-        # Response is the end
-        workflow.add_edge("response", END)
+    # Compile the graph
+    return workflow.compile(debug=False)
 
-        # Compile the graph
-        return workflow.compile()
 
-    async def process_message(self, message: str, session_id: str, user_id: str = None) -> dict:
-        """Process a user message and return the response"""
-        try:
-            from langchain_core.messages import HumanMessage
-            from .state import session_manager
+class SmartHomeAgent:
+    """Main agent class that orchestrates the workflow"""
 
-            # Get or create session
-            state = session_manager.get_session(session_id)
-            if state is None:
-                state = session_manager.create_session(session_id, user_id)
+    def __init__(self, intent_parser: Optional[IntentParser] = None):
+        self.intent_parser = intent_parser or IntentParser()
+        self.graph = _build_compiled_graph()
 
-            # Add user message to state
-            human_message = HumanMessage(content=message)
-            state["messages"].append(human_message)
+    async def process_message(self, message: str, session_id: str, db: Session, user_id: str = None) -> dict:
+        """Process a user message and return the response
 
-            # Process through the graph
-            result = await self.graph.ainvoke(state)
+        ``db`` is shared by every node that runs for this message.
+        """
+        try:
+            from .state import session_manager
 
-            # Update session
-            session_manager.update_session(session_id, result)
+            # Serialize turns of the same session; other sessions run in parallel
+            async with session_manager.lock_for(session_id):
+                # Get or create session
+                state = await session_manager.get_session(session_id)
+                if state is None:
+                    state = await session_manager.create_session(session_id, user_id)
+
+                # Add user message to state
+                human_message = HumanMessage(content=message)
+                state["messages"].append(human_message)
+                state["messages"] = trim_messages(
+                    state["messages"],
+                    max_tokens=settings.MAX_CONVERSATION_HISTORY,
+                    token_counter=len,
+                    strategy="last",
+                    start_on="human"
+                )
+
+                # Process through the graph
+                result = await self.graph.ainvoke(state, config={"configurable": {"db": db, "intent_parser": self.intent_parser}})
+
+                # Update session
+                await session_manager.update_session(session_id, result)
 
             # Return the response
             ai_response = result["messages"][-1].content
@@ -134,25 +120,20 @@ class SmartHomeAgent:
         """Get conversation history for a session"""
         from .state import session_manager
 
-        state = session_manager.get_session(session_id)
+        state = await session_manager.get_session(session_id)
         if state is None:
             return []
 
-        history = []
-        for message in state["messages"]:
-            history.append({
-                "type": "human" if message.__class__.__name__ == "HumanMessage" else "ai",
+        return [
+            {
+                "type": "human" if isinstance(message, HumanMessage) else "ai",
                 "content": message.content,
                 "timestamp": getattr(message, "timestamp", None)
-            })
-
-        return history
+            }
+            for message in state["messages"]
+        ]
 
-    def clear_session(self, session_id: str):
+    async def clear_session(self, session_id: str):
         """Clear session data"""
         from .state import session_manager
-        session_manager.clear_session(session_id)
-
-
-# Global agent instance
-smart_home_agent = SmartHomeAgent()
+        await session_manager.clear_session(session_id)
@@ -2,6 +2,7 @@
 Natural language intent recognition and entity extraction
 """
 import re
+from collections import OrderedDict
 from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime, date
 from langchain_core.messages import HumanMessage
@@ -14,6 +15,25 @@ from smart_home_agent.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Trigger words per intent; a message is classified without the LLM only
+# when exactly one intent's words appear in it
+INTENT_KEYWORDS: Dict[str, Tuple[str, ...]] = {
+    "add_bill": ("add", "create", "new bill"),
+    "query_expenses": ("search", "find", "show", "list bills"),
+    "get_summary": ("summary", "total", "overview"),
+    "list_upcoming": ("upcoming", "due", "next"),
+    "get_statistics": ("statistics", "stats", "analytics"),
+    "greeting": ("hello", "hi", "hey"),
+}
+
+# Words of intents that have no trigger words (update_bill, delete_bill,
+# add_maintenance, query_maintenance); messages containing them always go
+# to the LLM, so e.g. "add a maintenance task" never resolves to add_bill
+LLM_ONLY_KEYWORDS: Tuple[str, ...] = (
+    "delete", "remove", "update", "cancel", "change", "edit", "modify",
+    "maintenance", "task", "tasks", "repair", "repairs"
+)
+
 
 class IntentClassification(BaseModel):
     """Intent classification result"""
@@ -39,13 +59,44 @@ class IntentParser:
         "greeting"
     ]
 
+    # Confidence reported for intents resolved by keyword matching alone
+    KEYWORD_CONFIDENCE = 0.9
+
+    # Maximum number of normalized messages kept in the classification cache
+    CACHE_SIZE = 1024
+
+    ENTITY_CATEGORIES = (
+        'utilities', 'subscriptions', 'maintenance', 'insurance',
+        'rent', 'mortgage', 'internet', 'electricity', 'gas', 'water'
+    )
+
+    # Entity patterns, compiled once at class load
+    _MONEY_RE = re.compile(r'\$?(\d+(?:\.\d{2})?)')
+    _DATE_RES = [
+        re.compile(r'(\d{1,2}/\d{1,2}/\d{4})'),  # MM/DD/YYYY
+        re.compile(r'(\d{4}-\d{1,2}-\d{1,2})'),   # YYYY-MM-DD
+        re.compile(
+            r'(january|february|march|april|may|june|july|august|september|october|november|december)\s+\d{1,2}',
+            re.I
+        ),
+    ]
+    _CATEGORY_RE = re.compile(r'\b(' + '|'.join(ENTITY_CATEGORIES) + r')\b', re.I)
+
+    _INTENT_PATTERNS = {
+        intent: re.compile(r"\b(" + "|".join(map(re.escape, words)) + r")\b", re.I)
+        for intent, words in INTENT_KEYWORDS.items()
+    }
+    _LLM_ONLY_RE = re.compile(r"\b(" + "|".join(map(re.escape, LLM_ONLY_KEYWORDS)) + r")\b", re.I)
+
     def __init__(self, model_name: str = settings.AGENT_MODEL):
         print(f"Using model: {model_name}")
+        self._cache: "OrderedDict[str, IntentClassification]" = OrderedDict()
         self.llm = ChatOpenAI(
             openai_api_key=settings.OPENROUTER_API_KEY,  
             model_name='deepseek/deepseek-r1:free',
             openai_api_base="https://openrouter.ai/api/v1",
         )
+        self.structured_llm = self.llm.with_structured_output(IntentClassification)
         self.classification_prompt = ChatPromptTemplate.from_template("""
 You are an expert at understanding user intents for a home expense and maintenance management system.
 
@@ -76,95 +127,80 @@ Respond with the intent, confidence (0-1), and extracted entities.
 
     async def parse_intent(self, message: str) -> IntentClassification:
         """Parse intent from user message"""
+        cache_key = " ".join(message.lower().split())
+        cached = self._cache.get(cache_key)
+        if cached is not None:
+            self._cache.move_to_end(cache_key)
+            return cached.model_copy(deep=True)
+
         try:
-            # Use LLM for intent classification
-            response = await self.llm.ainvoke(
-                self.classification_prompt.format_messages(message=message)
+            classification = await self._classify(message)
+        except Exception as e:
+            logger.error(f"Intent parsing failed: {e}")
+            return IntentClassification(
+                intent="general_question",
+                confidence=0.5,
+                entities={}
             )
 
-            # Parse the response (simplified - in practice you'd use structured output)
-            intent, confidence, entities = self._parse_llm_response(response.content)
+        self._cache[cache_key] = classification
+        if len(self._cache) > self.CACHE_SIZE:
+            self._cache.popitem(last=False)
 
-            # Enhance with regex-based entity extraction
-            enhanced_entities = self._extract_entities_regex(message)
-            entities.update(enhanced_entities)
+        return classification.model_copy(deep=True)
 
+    async def _classify(self, message: str) -> IntentClassification:
+        """Classify a message that is not in the cache"""
+        # Cheap keyword pass first; ambiguous or unmatched messages go to the LLM
+        intent = self._match_intent(message.lower())
+        if intent is not None:
             return IntentClassification(
                 intent=intent,
-                confidence=confidence,
-                entities=entities
+                confidence=self.KEYWORD_CONFIDENCE,
+                entities=self._extract_entities_regex(message)
             )
 
-        except Exception as e:
-            logger.error(f"Intent parsing failed: {e}")
-            return IntentClassification(
-                intent="general_question",
-                confidence=0.5,
-                entities={}
-            )
+        # Use LLM for intent classification; the model fills the schema directly
+        result = await self.structured_llm.ainvoke(
+            self.classification_prompt.format_messages(message=message)
+        )
 
-    def _parse_llm_response(self, response: str) -> Tuple[str, float, Dict[str, Any]]:
-        """Parse LLM response (simplified implementation)"""
-        # This is a simplified parser - in practice you'd use structured output
-        intent = "general_question"
-        confidence = 0.8
-        entities = {}
+        # Enhance with regex-based entity extraction
+        result.entities.update(self._extract_entities_regex(message))
+
+        return result
 
-        response_lower = response.lower()
+    def _match_intent(self, text: str) -> Optional[str]:
+        """Return the intent whose trigger words appear in the text
 
-        # Simple intent detection
-        if any(word in response_lower for word in ["add", "create", "new bill"]):
-            intent = "add_bill"
-        elif any(word in response_lower for word in ["search", "find", "show", "list bills"]):
-            intent = "query_expenses"
-        elif any(word in response_lower for word in ["summary", "total", "overview"]):
-            intent = "get_summary"
-        elif any(word in response_lower for word in ["upcoming", "due", "next"]):
-            intent = "list_upcoming"
-        elif any(word in response_lower for word in ["statistics", "stats", "analytics"]):
-            intent = "get_statistics"
-        elif any(word in response_lower for word in ["hello", "hi", "hey"]):
-            intent = "greeting"
+        Returns None when no intent or more than one matches, or when the
+        text names an action only the LLM can classify.
+        """
+        if self._LLM_ONLY_RE.search(text):
+            return None
 
-        return intent, confidence, entities
+        matches = [intent for intent, pattern in self._INTENT_PATTERNS.items() if pattern.search(text)]
+        return matches[0] if len(matches) == 1 else None
 
     def _extract_entities_regex(self, message: str) -> Dict[str, Any]:
         """Extract entities using regex patterns"""
         entities = {}
 
         # Extract monetary amounts
-        money_pattern = r'\$?(\d+(?:\.\d{2})?)'
-        money_matches = re.findall(money_pattern, message)
-        if money_matches:
-            entities['amount'] = float(money_matches[0])
+        money_match = self._MONEY_RE.search(message)
+        if money_match:
+            entities['amount'] = float(money_match.group(1))
 
         # Extract dates (simple patterns)
-        date_patterns = [
-            r'(\d{1,2}/\d{1,2}/\d{4})',  # MM/DD/YYYY
-            r'(\d{4}-\d{1,2}-\d{1,2})',   # YYYY-MM-DD
-            r'(january|february|march|april|may|june|july|august|september|october|november|december)\s+\d{1,2}',
-        ]
-
-        for pattern in date_patterns:
-            matches = re.findall(pattern, message.lower())
-            if matches:
-                entities['date'] = matches[0]
+        for pattern in self._DATE_RES:
+            date_match = pattern.search(message)
+            if date_match:
+                entities['date'] = date_match.group(1).lower()
                 break
 
         # Extract categories
-        categories = [
-            'utilities', 'subscriptions', 'maintenance', 'insurance', 
-            'rent', 'mortgage', 'internet', 'electricity', 'gas', 'water'
-        ]
-
-        message_lower = message.lower()
-        for category in categories:
-            if category in message_lower:
-                entities['category'] = category.title()
-                break
+        category_match = self._CATEGORY_RE.search(message)
+        if category_match:
+            entities['category'] = category_match.group(1).title()
 
         return entities
-
-
-# Global intent parser instance
-intent_parser = IntentParser()
@@ -1,52 +1,95 @@
 """
 LangGraph nodes for agent workflow
 """
-from typing import Dict, Any
+from enum import Enum
+from typing import Dict, Any, Callable, Literal
 import logging
 from datetime import datetime, date, timedelta
 from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
+from langchain_core.messages import HumanMessage
+from langchain_core.runnables import RunnableConfig
+from langgraph.types import Command
 
-from smart_home_agent.core.database import get_db, DatabaseManager
+from smart_home_agent.core.database import get_db
 from smart_home_agent.models import Bill, Category, MaintenanceTask, BillStatus
 from smart_home_agent.services.expense_service import ExpenseService
 from smart_home_agent.services.analytics_service import AnalyticsService
 from .state import AgentState
-from .intent_parser import intent_parser
 
 logger = logging.getLogger(__name__)
 
+# Nodes input_node can dispatch to; any other intent goes straight to "response"
+ActionNode = Literal["add_bill", "query_expenses", "get_summary", "list_upcoming", "get_statistics", "response"]
+ACTION_INTENTS = frozenset({"add_bill", "query_expenses", "get_summary", "list_upcoming", "get_statistics"})
 
-async def input_node(state: AgentState) -> AgentState:
+
+def _bill_result(bill: Bill) -> Dict[str, Any]:
+    """Bill as a query_results entry
+
+    Enum members are stored by value: the session store serializes state
+    with msgpack, which refuses to load unregistered types like BillStatus.
+    """
+    return {
+        key: value.value if isinstance(value, Enum) else value
+        for key, value in bill.to_dict().items()
+    }
+
+
+def _get_db(config: RunnableConfig) -> Session:
+    """Return the database session shared by all nodes of the current turn
+
+    The session is synchronous; nodes call service methods through
+    ``run_in_threadpool`` so queries never block the event loop.
+    """
+    return config["configurable"]["db"]
+
+
+async def input_node(state: AgentState, config: RunnableConfig) -> Command[ActionNode]:
     """Process user input and extract intent"""
     try:
         # Get the latest message
         if not state["messages"]:
-            return state
+            return Command(update=state, goto="response")
 
         latest_message = state["messages"][-1]
-        user_input = latest_message.content
-
-        # Parse intent and entities
-        classification = await intent_parser.parse_intent(user_input)
+        user_input = latest_message.content.strip()
+        previous_input = next(
+            (m.content.strip() for m in reversed(state["messages"][:-1]) if isinstance(m, HumanMessage)),
+            None
+        )
+
+        if not user_input:
+            # Nothing to classify; answer with the greeting
+            intent, entities = "greeting", {}
+        elif user_input == previous_input and state["current_intent"]:
+            # Repeated message (double submit); reuse the last classification
+            intent, entities = state["current_intent"], state["extracted_entities"]
+        else:
+            # Parse intent and entities
+            intent_parser = config["configurable"]["intent_parser"]
+            classification = await intent_parser.parse_intent(user_input)
+            intent, entities = classification.intent, classification.entities
 
         # Update state
-        state["current_intent"] = classification.intent
-        state["extracted_entities"] = classification.entities
+        state["current_intent"] = intent
+        state["extracted_entities"] = entities
         state["conversation_step"] += 1
         state["needs_clarification"] = False
 
-        logger.info(f"Parsed intent: {classification.intent} with entities: {classification.entities}")
+        logger.info(f"Parsed intent: {intent} with entities: {entities}")
 
-        return state
+        goto = intent if intent in ACTION_INTENTS else "response"
+        return Command(update=state, goto=goto)
 
     except Exception as e:
         logger.error(f"Error in input_node: {e}")
         state["error_message"] = str(e)
         state["action_successful"] = False
-        return state
+        return Command(update=state, goto="response")
 
 
-async def add_bill_node(state: AgentState) -> AgentState:
+async def add_bill_node(state: AgentState, config: RunnableConfig) -> Command[Literal["response"]]:
     """Handle adding a new bill"""
     try:
         entities = state["extracted_entities"]
@@ -58,136 +101,136 @@ async def add_bill_node(state: AgentState) -> AgentState:
         if missing_fields:
             state["needs_clarification"] = True
             state["clarification_question"] = f"I need more information. Please provide: {', '.join(missing_fields)}"
-            return state
+            return Command(update=state, goto="response")
 
         # Create bill with available information
-        with DatabaseManager() as db:
-            expense_service = ExpenseService(db)
+        db = _get_db(config)
+        expense_service = ExpenseService(db)
 
-            # Get or create category
-            category_name = entities.get("category", "Other")
-            category = expense_service.get_or_create_category(category_name)
+        # Get or create category
+        category_name = entities.get("category", "Other")
+        category_id = await run_in_threadpool(expense_service.get_or_create_category_id, category_name)
 
-            # Create bill
-            bill_data = {
-                "name": entities.get("bill_name", "New Bill"),
-                "amount": entities["amount"],
-                "due_date": entities.get("date", date.today() + timedelta(days=30)),
-                "category_id": category.id,
-                "description": entities.get("description", ""),
-                "status": BillStatus.PENDING
-            }
+        # Create bill
+        bill_data = {
+            "name": entities.get("bill_name", "New Bill"),
+            "amount": entities["amount"],
+            "due_date": entities.get("date", date.today() + timedelta(days=30)),
+            "category_id": category_id,
+            "description": entities.get("description", ""),
+            "status": BillStatus.PENDING
+        }
 
-            new_bill = expense_service.create_bill(bill_data)
+        new_bill = await run_in_threadpool(expense_service.create_bill, bill_data)
 
-            state["query_results"] = [new_bill.to_dict()]
-            state["action_successful"] = True
-            state["last_action"] = "add_bill"
+        state["query_results"] = [_bill_result(new_bill)]
+        state["action_successful"] = True
+        state["last_action"] = "add_bill"
 
-        return state
+        return Command(update=state, goto="response")
 
     except Exception as e:
         logger.error(f"Error in add_bill_node: {e}")
         state["error_message"] = str(e)
         state["action_successful"] = False
-        return state
+        return Command(update=state, goto="response")
 
 
-async def query_expenses_node(state: AgentState) -> AgentState:
+async def query_expenses_node(state: AgentState, config: RunnableConfig) -> Command[Literal["response"]]:
     """Handle querying expenses"""
     try:
         entities = state["extracted_entities"]
 
-        with DatabaseManager() as db:
-            expense_service = ExpenseService(db)
+        db = _get_db(config)
+        expense_service = ExpenseService(db)
 
-            # Build query filters
-            filters = {}
-            if "category" in entities:
-                filters["category"] = entities["category"]
-            if "date" in entities:
-                filters["date_range"] = entities["date"]
+        # Build query filters
+        filters = {}
+        if "category" in entities:
+            filters["category"] = entities["category"]
+        if "date" in entities:
+            filters["date_range"] = entities["date"]
 
-            # Query bills
-            bills = expense_service.query_bills(filters)
+        # Query bills
+        bills = await run_in_threadpool(expense_service.query_bills, filters)
 
-            state["query_results"] = [bill.to_dict() for bill in bills]
-            state["action_successful"] = True
-            state["last_action"] = "query_expenses"
+        state["query_results"] = [_bill_result(bill) for bill in bills]
+        state["action_successful"] = True
+        state["last_action"] = "query_expenses"
 
-        return state
+        return Command(update=state, goto="response")
 
     except Exception as e:
         logger.error(f"Error in query_expenses_node: {e}")
         state["error_message"] = str(e)
         state["action_successful"] = False
-        return state
+        return Command(update=state, goto="response")
 
 
-async def get_summary_node(state: AgentState) -> AgentState:
+async def get_summary_node(state: AgentState, config: RunnableConfig) -> Command[Literal["response"]]:
     """Handle getting expense summary"""
     try:
-        with DatabaseManager() as db:
-            analytics_service = AnalyticsService(db)
+        db = _get_db(config)
+        analytics_service = AnalyticsService(db)
 
-            # Get monthly summary
-            summary = analytics_service.get_monthly_summary()
+        # Get monthly summary
+        summary = await run_in_threadpool(analytics_service.get_monthly_summary)
 
-            state["summary_data"] = summary
-            state["action_successful"] = True
-            state["last_action"] = "get_summary"
+        state["summary_data"] = summary
+        state["action_successful"] = True
+        state["last_action"] = "get_summary"
 
-        return state
+        return Command(update=state, goto="response")
 
     except Exception as e:
         logger.error(f"Error in get_summary_node: {e}")
         state["error_message"] = str(e)
         state["action_successful"] = False
-        return state
+        return Command(update=state, goto="response")
 
 
-async def list_upcoming_node(state: AgentState) -> AgentState:
+async def list_upcoming_node(state: AgentState, config: RunnableConfig) -> Command[Literal["response"]]:
     """Handle listing upcoming bills"""
     try:
-        with DatabaseManager() as db:
-            expense_service = ExpenseService(db)
+        db = _get_db(config)
+        expense_service = ExpenseService(db)
 
-            # Get upcoming bills (next 30 days)
-            upcoming_bills = expense_service.get_upcoming_bills(days=30)
+        # Get upcoming bills (next 30 days)
+        upcoming_bills = await run_in_threadpool(expense_service.get_upcoming_bills, days=30)
 
-            state["query_results"] = [bill.to_dict() for bill in upcoming_bills]
-            state["action_successful"] = True
-            state["last_action"] = "list_upcoming"
+        state["query_results"] = [_bill_result(bill) for bill in upcoming_bills]
+        state["action_successful"] = True
+        state["last_action"] = "list_upcoming"
 
-        return state
+        return Command(update=state, goto="response")
 
     except Exception as e:
         logger.error(f"Error in list_upcoming_node: {e}")
         state["error_message"] = str(e)
         state["action_successful"] = False
-        return state
+        return Command(update=state, goto="response")
 
 
-async def get_statistics_node(state: AgentState) -> AgentState:
+async def get_statistics_node(state: AgentState, config: RunnableConfig) -> Command[Literal["response"]]:
     """Handle getting statistics"""
     try:
-        with DatabaseManager() as db:
-            analytics_service = AnalyticsService(db)
+        db = _get_db(config)
+        analytics_service = AnalyticsService(db)
 
-            # Get comprehensive statistics
-            stats = analytics_service.get_comprehensive_stats()
+        # Get comprehensive statistics
+        stats = await run_in_threadpool(analytics_service.get_comprehensive_stats)
 
-            state["summary_data"] = stats
-            state["action_successful"] = True
-            state["last_action"] = "get_statistics"
+        state["summary_data"] = stats
+        state["action_successful"] = True
+        state["last_action"] = "get_statistics"
 
-        return state
+        return Command(update=state, goto="response")
 
     except Exception as e:
         logger.error(f"Error in get_statistics_node: {e}")
         state["error_message"] = str(e)
         state["action_successful"] = False
-        return state
+        return Command(update=state, goto="response")
 
 
 async def response_node(state: AgentState) -> AgentState:
@@ -220,55 +263,75 @@ async def response_node(state: AgentState) -> AgentState:
         return state
 
 
-def generate_response_for_intent(intent: str, state: AgentState) -> str:
-    """Generate appropriate response based on intent"""
-    if intent == "add_bill":
-        if state["action_successful"]:
-            bill_data = state["query_results"][0]
-            return f"✅ Successfully added bill: {bill_data['name']} for ${bill_data['amount']} due on {bill_data['due_date']}"
-        else:
-            return "❌ Failed to add the bill. Please try again."
-
-    elif intent == "query_expenses":
-        results = state["query_results"]
-        if results:
-            response = f"Found {len(results)} bills:\n"
-            for bill in results[:5]:  # Limit to 5 results
-                response += f"• {bill['name']}: ${bill['amount']} due {bill['due_date']}\n"
-            if len(results) > 5:
-                response += f"... and {len(results) - 5} more"
-            return response
-        else:
-            return "No bills found matching your criteria."
+def _format_bill_line(bill: Dict[str, Any]) -> str:
+    return f"• {bill['name']}: ${bill['amount']} due {bill['due_date']}"
+
+
+def _respond_add_bill(state: AgentState) -> str:
+    if state["action_successful"]:
+        bill_data = state["query_results"][0]
+        return f"✅ Successfully added bill: {bill_data['name']} for ${bill_data['amount']} due on {bill_data['due_date']}"
+    return "❌ Failed to add the bill. Please try again."
+
 
-    elif intent == "get_summary":
-        summary = state["summary_data"]
-        return f"""📊 Monthly Summary:
+def _respond_query_expenses(state: AgentState) -> str:
+    results = state["query_results"]
+    if not results:
+        return "No bills found matching your criteria."
+
+    lines = [f"Found {len(results)} bills:"]
+    lines.extend(_format_bill_line(bill) for bill in results[:5])  # Limit to 5 results
+    lines.append(f"... and {len(results) - 5} more" if len(results) > 5 else "")
+    return "\n".join(lines)
+
+
+def _respond_get_summary(state: AgentState) -> str:
+    summary = state["summary_data"]
+    return f"""📊 Monthly Summary:
 • Total expenses: ${summary.get('total_amount', 0):.2f}
 • Number of bills: {summary.get('total_bills', 0)}
 • Categories: {summary.get('categories_count', 0)}
 • Average bill amount: ${summary.get('average_amount', 0):.2f}"""
 
-    elif intent == "list_upcoming":
-        results = state["query_results"]
-        if results:
-            response = f"📅 Upcoming bills ({len(results)}):\n"
-            for bill in results:
-                response += f"• {bill['name']}: ${bill['amount']} due {bill['due_date']}\n"
-            return response
-        else:
-            return "No upcoming bills found."
 
-    elif intent == "get_statistics":
-        stats = state["summary_data"]
-        return f"""📈 Expense Statistics:
+def _respond_list_upcoming(state: AgentState) -> str:
+    results = state["query_results"]
+    if not results:
+        return "No upcoming bills found."
+
+    lines = [f"📅 Upcoming bills ({len(results)}):"]
+    lines.extend(_format_bill_line(bill) for bill in results)
+    lines.append("")
+    return "\n".join(lines)
+
+
+def _respond_get_statistics(state: AgentState) -> str:
+    stats = state["summary_data"]
+    return f"""📈 Expense Statistics:
 • This month: ${stats.get('current_month_total', 0):.2f}
 • Last month: ${stats.get('last_month_total', 0):.2f}
 • Average monthly: ${stats.get('average_monthly', 0):.2f}
 • Top category: {stats.get('top_category', 'N/A')}"""
 
-    elif intent == "greeting":
-        return "Hello! I'm your Smart Home Expense & Maintenance Assistant. I can help you manage bills, track expenses, and schedule maintenance tasks. What would you like to do today?"
 
-    else:
-        return "I understand you have a question about your expenses or maintenance. Could you please be more specific about what you'd like to know?"
+def _respond_greeting(state: AgentState) -> str:
+    return "Hello! I'm your Smart Home Expense & Maintenance Assistant. I can help you manage bills, track expenses, and schedule maintenance tasks. What would you like to do today?"
+
+
+def _respond_default(state: AgentState) -> str:
+    return "I understand you have a question about your expenses or maintenance. Could you please be more specific about what you'd like to know?"
+
+
+_RESPONSE_BUILDERS: Dict[str, Callable[[AgentState], str]] = {
+    "add_bill": _respond_add_bill,
+    "query_expenses": _respond_query_expenses,
+    "get_summary": _respond_get_summary,
+    "list_upcoming": _respond_list_upcoming,
+    "get_statistics": _respond_get_statistics,
+    "greeting": _respond_greeting,
+}
+
+
+def generate_response_for_intent(intent: str, state: AgentState) -> str:
+    """Generate appropriate response based on intent"""
+    return _RESPONSE_BUILDERS.get(intent, _respond_default)(state)
@@ -1,10 +1,17 @@
 """
 Agent state management for conversation context
 """
+import asyncio
+import weakref
 from typing import Dict, List, Any, Optional, Annotated
 from typing_extensions import TypedDict
+from cachetools import TTLCache
 from langgraph.graph.message import add_messages
 from langchain_core.messages import BaseMessage
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from redis import asyncio as aioredis
+
+from smart_home_agent.core.config import settings
 
 
 class AgentState(TypedDict):
@@ -36,12 +43,43 @@ class AgentState(TypedDict):
 
 
 class SessionManager:
-    """Manage agent sessions and state persistence"""
-
-    def __init__(self):
-        self.sessions: Dict[str, AgentState] = {}
-
-    def create_session(self, session_id: str, user_id: Optional[str] = None) -> AgentState:
+    """Manage agent sessions and state persistence
+
+    Sessions live in process memory unless a Redis URL is configured, in
+    which case they are stored in Redis so any worker process can serve
+    any session. Either way, sessions idle for longer than ``session_ttl``
+    seconds are dropped.
+    """
+
+    KEY_PREFIX = "smart_home_agent:session:"
+
+    def __init__(
+        self,
+        redis_url: Optional[str] = None,
+        max_sessions: int = 10_000,
+        session_ttl: int = 3600
+    ):
+        self.sessions: TTLCache = TTLCache(maxsize=max_sessions, ttl=session_ttl)
+        self.session_ttl = session_ttl
+        self._redis = aioredis.from_url(redis_url) if redis_url else None
+        self._serde = JsonPlusSerializer()
+        self._locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+    def _key(self, session_id: str) -> str:
+        return f"{self.KEY_PREFIX}{session_id}"
+
+    def lock_for(self, session_id: str) -> asyncio.Lock:
+        """Return the lock guarding a session's read-process-write cycle
+
+        Locks are per process and are dropped once nobody holds them.
+        """
+        lock = self._locks.get(session_id)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._locks[session_id] = lock
+        return lock
+
+    async def create_session(self, session_id: str, user_id: Optional[str] = None) -> AgentState:
         """Create a new agent session"""
         initial_state = AgentState(
             messages=[],
@@ -58,22 +96,44 @@ class SessionManager:
             needs_clarification=False,
             clarification_question=None
         )
-        self.sessions[session_id] = initial_state
+        await self.update_session(session_id, initial_state)
         return initial_state
 
-    def get_session(self, session_id: str) -> Optional[AgentState]:
+    async def get_session(self, session_id: str) -> Optional[AgentState]:
         """Get existing session state"""
-        return self.sessions.get(session_id)
+        if self._redis is None:
+            return self.sessions.get(session_id)
 
-    def update_session(self, session_id: str, state: AgentState):
-        """Update session state"""
-        self.sessions[session_id] = state
+        type_, data = await self._redis.hmget(self._key(session_id), "type", "data")
+        if data is None:
+            return None
+        return self._serde.loads_typed((type_.decode(), data))
 
-    def clear_session(self, session_id: str):
+    async def update_session(self, session_id: str, state: AgentState):
+        """Update session state"""
+        if self._redis is None:
+            self.sessions[session_id] = state
+            return
+
+        key = self._key(session_id)
+        type_, data = self._serde.dumps_typed(dict(state))
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.hset(key, mapping={"type": type_, "data": data})
+            pipe.expire(key, self.session_ttl)
+            await pipe.execute()
+
+    async def clear_session(self, session_id: str):
         """Clear session data"""
-        if session_id in self.sessions:
-            del self.sessions[session_id]
+        if self._redis is None:
+            self.sessions.pop(session_id, None)
+            return
+
+        await self._redis.delete(self._key(session_id))
 
 
 # Global session manager instance
-session_manager = SessionManager()
+session_manager = SessionManager(
+    settings.REDIS_URL or None,
+    max_sessions=settings.MAX_SESSIONS,
+    session_ttl=settings.SESSION_TTL
+)
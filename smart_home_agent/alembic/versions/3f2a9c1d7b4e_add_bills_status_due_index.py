@@ -0,0 +1,28 @@
+"""add bills status/due_date index
+
+Revision ID: 3f2a9c1d7b4e
+Revises: 
+Create Date: 2026-10-15 04:28:01.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f2a9c1d7b4e'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # init_db's create_all already builds this index on fresh databases
+    op.create_index('ix_bills_status_due', 'bills', ['status', 'due_date'], unique=False, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_bills_status_due', table_name='bills', if_exists=True)
@@ -0,0 +1,70 @@
+"""add monthly_category_totals rollup
+
+Revision ID: 8c41e07b2d95
+Revises: 3f2a9c1d7b4e
+Create Date: 2026-10-15 04:52:10.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c41e07b2d95'
+down_revision: Union[str, Sequence[str], None] = '3f2a9c1d7b4e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'monthly_category_totals',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('year', sa.Integer(), nullable=False),
+        sa.Column('month', sa.Integer(), nullable=False),
+        sa.Column('category_id', sa.Integer(), nullable=False),
+        sa.Column('total_amount', sa.Numeric(precision=12, scale=2), nullable=False),
+        sa.Column('bill_count', sa.Integer(), nullable=False),
+        sa.Column('paid_count', sa.Integer(), nullable=False),
+        sa.Column('pending_count', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['category_id'], ['categories.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('year', 'month', 'category_id', name='uq_monthly_category_totals_key'),
+        if_not_exists=True
+    )
+    op.create_index(op.f('ix_monthly_category_totals_id'), 'monthly_category_totals', ['id'], unique=False, if_not_exists=True)
+    op.create_index('ix_monthly_category_totals_category', 'monthly_category_totals', ['category_id'], unique=False, if_not_exists=True)
+
+    # Backfill from existing bills (status is stored by enum name)
+    op.execute("""
+        INSERT INTO monthly_category_totals
+            (year, month, category_id, total_amount, bill_count, paid_count, pending_count)
+        SELECT
+            CAST(EXTRACT(year FROM due_date) AS INTEGER),
+            CAST(EXTRACT(month FROM due_date) AS INTEGER),
+            category_id,
+            SUM(amount),
+            COUNT(id),
+            COUNT(CASE WHEN status = 'PAID' THEN id END),
+            COUNT(CASE WHEN status = 'PENDING' THEN id END)
+        FROM bills
+        GROUP BY 1, 2, 3
+        ON CONFLICT ON CONSTRAINT uq_monthly_category_totals_key DO UPDATE SET
+            total_amount = EXCLUDED.total_amount,
+            bill_count = EXCLUDED.bill_count,
+            paid_count = EXCLUDED.paid_count,
+            pending_count = EXCLUDED.pending_count,
+            updated_at = now()
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_monthly_category_totals_category', table_name='monthly_category_totals')
+    op.drop_index(op.f('ix_monthly_category_totals_id'), table_name='monthly_category_totals')
+    op.drop_table('monthly_category_totals')
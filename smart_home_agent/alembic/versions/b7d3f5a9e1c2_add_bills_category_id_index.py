@@ -0,0 +1,27 @@
+"""add bills category_id index
+
+Revision ID: b7d3f5a9e1c2
+Revises: 8c41e07b2d95
+Create Date: 2026-10-15 05:06:42.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d3f5a9e1c2'
+down_revision: Union[str, Sequence[str], None] = '8c41e07b2d95'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(op.f('ix_bills_category_id'), 'bills', ['category_id'], unique=False, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_bills_category_id'), table_name='bills', if_exists=True)
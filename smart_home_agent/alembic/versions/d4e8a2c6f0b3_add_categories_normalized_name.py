@@ -0,0 +1,37 @@
+"""add categories normalized_name
+
+Revision ID: d4e8a2c6f0b3
+Revises: b7d3f5a9e1c2
+Create Date: 2026-10-15 05:21:18.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4e8a2c6f0b3'
+down_revision: Union[str, Sequence[str], None] = 'b7d3f5a9e1c2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Databases built by init_db's create_all already have the column
+    op.add_column('categories', sa.Column('normalized_name', sa.String(length=100), nullable=True), if_not_exists=True)
+
+    # Backfill from existing names; rows already filled in are left alone,
+    # and SET NOT NULL is a no-op on a column that already has it
+    op.execute("UPDATE categories SET normalized_name = lower(name) WHERE normalized_name IS NULL")
+
+    op.alter_column('categories', 'normalized_name', existing_type=sa.String(length=100), nullable=False)
+    op.create_index(op.f('ix_categories_normalized_name'), 'categories', ['normalized_name'], unique=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_categories_normalized_name'), table_name='categories', if_exists=True)
+    op.drop_column('categories', 'normalized_name', if_exists=True)
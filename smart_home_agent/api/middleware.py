@@ -1,98 +1,151 @@
 """
 Custom middleware for the API
+
+The middleware classes are plain ASGI callables rather than
+``BaseHTTPMiddleware`` subclasses, which avoids the extra task group and
+memory stream Starlette creates around every request for ``dispatch``.
 """
 import time
-import uuid
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.middleware.base import RequestResponseEndpoint
+from fastapi.responses import ORJSONResponse
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from smart_home_agent.core.config import settings
+from smart_home_agent.utils.helpers import fast_uuid
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Load balancer probes; not logged and given no request or session ID
+_SKIP_PATHS = frozenset({"/health", f"{settings.API_PREFIX}/health"})
+
 
-class RequestLoggingMiddleware(BaseHTTPMiddleware):
+class RequestLoggingMiddleware:
     """Middleware to log requests and responses"""
 
-    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
-        # Generate request ID
-        request_id = str(uuid.uuid4())
-        request.state.request_id = request_id
+    def __init__(self, app: ASGIApp):
+        self.app = app
 
-        # Start timing
-        start_time = time.time()
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in _SKIP_PATHS:
+            await self.app(scope, receive, send)
+            return
 
-        # Log request
-        logger.info(
-            f"Request {request_id}: {request.method} {request.url.path} "
-            f"from {request.client.host if request.client else 'unknown'}"
-        )
+        # Generate request ID; scope["state"] backs request.state downstream
+        request_id = fast_uuid()
+        scope.setdefault("state", {})["request_id"] = request_id
 
-        # Process request
-        try:
-            response = await call_next(request)
+        # Start timing (integer nanoseconds, monotonic)
+        start_ns = time.perf_counter_ns()
 
-            # Calculate processing time
-            process_time = time.time() - start_time
+        # Skip both log calls (and their argument lookups) when INFO is off
+        log_enabled = logger.isEnabledFor(logging.INFO)
 
-            # Log response
+        # Log request
+        if log_enabled:
+            client = scope.get("client")
             logger.info(
-                f"Response {request_id}: {response.status_code} "
-                f"in {process_time:.3f}s"
+                "Request %s: %s %s from %s",
+                request_id, scope["method"], scope["path"],
+                client[0] if client else "unknown"
             )
 
-            # Add headers
-            response.headers["X-Request-ID"] = request_id
-            response.headers["X-Process-Time"] = str(process_time)
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                # Calculate processing time as whole seconds and milliseconds
+                seconds, millis = divmod((time.perf_counter_ns() - start_ns) // 1_000_000, 1000)
+
+                # Log response
+                if log_enabled:
+                    logger.info(
+                        "Response %s: %s in %d.%03ds",
+                        request_id, message["status"], seconds, millis
+                    )
+
+                # Add headers
+                headers = MutableHeaders(scope=message)
+                headers.append("X-Request-ID", request_id)
+                headers.append("X-Process-Time", "%d.%03d" % (seconds, millis))
 
-            return response
+            await send(message)
 
+        # Process request
+        try:
+            await self.app(scope, receive, send_wrapper)
         except Exception as e:
-            process_time = time.time() - start_time
-            logger.error(
-                f"Error {request_id}: {str(e)} in {process_time:.3f}s"
-            )
+            seconds, millis = divmod((time.perf_counter_ns() - start_ns) // 1_000_000, 1000)
+            logger.error("Error %s: %s in %d.%03ds", request_id, e, seconds, millis)
             raise
 
 
-class SessionMiddleware(BaseHTTPMiddleware):
+class SessionMiddleware:
     """Middleware to handle session management"""
 
-    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
-        # Generate session ID if not present
-        session_id = request.headers.get("X-Session-ID")
-        if not session_id:
-            session_id = str(uuid.uuid4())
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in _SKIP_PATHS:
+            await self.app(scope, receive, send)
+            return
 
-        request.state.session_id = session_id
+        # Generate session ID if not present (ASGI header names are lowercase)
+        session_id = next(
+            (value.decode("latin-1") for name, value in scope["headers"] if name == b"x-session-id"),
+            None
+        )
+        if not session_id:
+            session_id = fast_uuid()
 
-        response = await call_next(request)
+        scope.setdefault("state", {})["session_id"] = session_id
 
-        # Add session ID to response headers
-        response.headers["X-Session-ID"] = session_id
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                # Add session ID to response headers
+                MutableHeaders(scope=message).append("X-Session-ID", session_id)
+            await send(message)
 
-        return response
+        await self.app(scope, receive, send_wrapper)
 
 
-class ErrorHandlingMiddleware(BaseHTTPMiddleware):
+class ErrorHandlingMiddleware:
     """Middleware for global error handling"""
 
-    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        response_started = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
         try:
-            return await call_next(request)
+            await self.app(scope, receive, send_wrapper)
         except Exception as e:
-            logger.error(f"Unhandled error in request {getattr(request.state, 'request_id', 'unknown')}: {e}")
+            request_id = scope.get("state", {}).get("request_id")
+            logger.error("Unhandled error in request %s: %s", request_id or "unknown", e)
+
+            # Too late to replace a response that is already being sent
+            if response_started:
+                raise
 
             # Return a generic error response
-            from fastapi.responses import JSONResponse
-            return JSONResponse(
+            response = ORJSONResponse(
                 status_code=500,
                 content={
                     "error": "Internal server error",
                     "detail": "An unexpected error occurred. Please try again later.",
-                    "request_id": getattr(request.state, "request_id", None)
+                    "request_id": request_id
                 }
             )
+            await response(scope, receive, send)
 
 
 def setup_middleware(app):
@@ -2,16 +2,19 @@
 FastAPI routes for the Smart Home Agent API
 """
 from fastapi import APIRouter, Depends, HTTPException, Request, Query
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from pydantic import TypeAdapter
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Iterable, Iterator, List, Optional
+from itertools import islice
 import logging
-import uuid
 from datetime import date
 
 from smart_home_agent.core.database import get_db
 from smart_home_agent.services.expense_service import ExpenseService
 from smart_home_agent.services.analytics_service import AnalyticsService
-from smart_home_agent.agent import smart_home_agent
+from smart_home_agent.agent import SmartHomeAgent
+from smart_home_agent.utils.helpers import fast_uuid
 from .schemas import (
     CreateBillRequest,
     UpdateBillRequest,
@@ -28,6 +31,41 @@ from .schemas import (
 
 logger = logging.getLogger(__name__)
 
+# Bills serialized per chunk of a streamed response
+_STREAM_CHUNK_SIZE = 100
+
+# Validate whole result lists in one call instead of one model per row
+_BILL_LIST_ADAPTER = TypeAdapter(List[BillResponse])
+_CATEGORY_LIST_ADAPTER = TypeAdapter(List[CategoryResponse])
+
+
+def _dump_bills(bills) -> List[dict]:
+    """Validate ORM bills and dump them to JSON-ready dicts in one pass each"""
+    return _BILL_LIST_ADAPTER.dump_python(
+        _BILL_LIST_ADAPTER.validate_python(bills, from_attributes=True), mode="json"
+    )
+
+
+def _stream_bills(bills: Iterable) -> Iterator[bytes]:
+    """Yield bills as one JSON array, serializing a chunk of bills at a time
+
+    Plain (sync) generator: StreamingResponse runs it in the threadpool, so
+    the database fetches behind ``bills`` do not block the event loop.
+    """
+    bills = iter(bills)
+    separator = b"["
+    while True:
+        chunk = list(islice(bills, _STREAM_CHUNK_SIZE))
+        if not chunk:
+            break
+        # dump_json gives "[...]"; keep only the items
+        yield separator + _BILL_LIST_ADAPTER.dump_json(
+            _BILL_LIST_ADAPTER.validate_python(chunk, from_attributes=True)
+        )[1:-1]
+        separator = b","
+    yield b"[]" if separator == b"[" else b"]"
+
+
 # Create main API router
 api_router = APIRouter()
 
@@ -38,20 +76,28 @@ analytics_router = APIRouter(prefix="/analytics", tags=["Analytics"])
 categories_router = APIRouter(prefix="/categories", tags=["Categories"])
 
 
+async def get_agent(request: Request) -> SmartHomeAgent:
+    """Dependency to get the agent created at application startup"""
+    return request.app.state.smart_home_agent
+
+
 @agent_router.post("/chat", response_model=AgentResponse)
 async def chat_with_agent(
     request: AgentQueryRequest,
-    http_request: Request
+    http_request: Request,
+    db: Session = Depends(get_db),
+    smart_home_agent: SmartHomeAgent = Depends(get_agent)
 ):
     """Chat with the Smart Home Agent"""
     try:
         # Get or generate session ID
-        session_id = request.session_id or getattr(http_request.state, "session_id", str(uuid.uuid4()))
+        session_id = request.session_id or getattr(http_request.state, "session_id", fast_uuid())
 
         # Process message through agent
         result = await smart_home_agent.process_message(
             message=request.message,
             session_id=session_id,
+            db=db,
             user_id=request.user_id
         )
 
@@ -63,7 +109,10 @@ async def chat_with_agent(
 
 
 @agent_router.get("/history/{session_id}")
-async def get_conversation_history(session_id: str):
+async def get_conversation_history(
+    session_id: str,
+    smart_home_agent: SmartHomeAgent = Depends(get_agent)
+):
     """Get conversation history for a session"""
     try:
         history = await smart_home_agent.get_session_history(session_id)
@@ -74,10 +123,13 @@ async def get_conversation_history(session_id: str):
 
 
 @agent_router.delete("/session/{session_id}")
-async def clear_session(session_id: str):
+async def clear_session(
+    session_id: str,
+    smart_home_agent: SmartHomeAgent = Depends(get_agent)
+):
     """Clear agent session data"""
     try:
-        smart_home_agent.clear_session(session_id)
+        await smart_home_agent.clear_session(session_id)
         return SuccessResponse(message="Session cleared successfully")
     except Exception as e:
         logger.error(f"Error clearing session: {e}")
@@ -93,21 +145,17 @@ async def create_bill(
     try:
         expense_service = ExpenseService(db)
 
-        # Get or create category
-        category = expense_service.get_or_create_category(bill_data.category_name)
-
         # Prepare bill data
-        bill_dict = bill_data.dict(exclude={"category_name"})
-        bill_dict["category_id"] = category.id
+        bill_dict = bill_data.model_dump(exclude={"category_name"})
+        bill_dict["category_id"] = expense_service.get_or_create_category_id(bill_data.category_name)
 
         # Create bill
         bill = expense_service.create_bill(bill_dict)
 
-        return BillResponse.from_orm(bill)
+        return BillResponse.model_validate(bill)
 
-    except Exception as e:
-        print(f"Error creating bill: {bill_dict}")
-        logger.error(f"Error creating bill: {e}")
+    except Exception:
+        logger.exception("Error creating bill", extra={"payload": bill_data})
         raise HTTPException(status_code=500, detail="Failed to create bill")
 
 
@@ -127,27 +175,24 @@ async def get_bills(
     try:
         expense_service = ExpenseService(db)
 
-        # Build filters
-        filters = {}
-        if category:
-            filters["category"] = category
-        if status:
-            filters["status"] = status
-        if min_amount is not None:
-            filters["min_amount"] = min_amount
-        if max_amount is not None:
-            filters["max_amount"] = max_amount
-        if due_date_from:
-            filters["due_date_from"] = due_date_from
-        if due_date_to:
-            filters["due_date_to"] = due_date_to
-
-        bills = expense_service.query_bills(filters)
-
-        # Apply pagination
-        paginated_bills = bills[offset:offset + limit]
+        # Build filters from the parameters that were given (0 is a valid amount)
+        filters = {
+            key: value
+            for key, value in (
+                ("category", category),
+                ("status", status),
+                ("min_amount", min_amount),
+                ("max_amount", max_amount),
+                ("due_date_from", due_date_from),
+                ("due_date_to", due_date_to),
+            )
+            if value not in (None, "")
+        }
 
-        return [BillResponse.from_orm(bill) for bill in paginated_bills]
+        # Rows are fetched and serialized while the body is sent; the get_db
+        # session stays open until the response has finished
+        bills = expense_service.query_bills(filters, limit=limit, offset=offset, stream=True)
+        return StreamingResponse(_stream_bills(bills), media_type="application/json")
 
     except Exception as e:
         logger.error(f"Error getting bills: {e}")
@@ -164,7 +209,7 @@ async def get_bill(bill_id: int, db: Session = Depends(get_db)):
         if not bill:
             raise HTTPException(status_code=404, detail="Bill not found")
 
-        return BillResponse.from_orm(bill)
+        return BillResponse.model_validate(bill)
 
     except HTTPException:
         raise
@@ -184,12 +229,11 @@ async def update_bill(
         expense_service = ExpenseService(db)
 
         # Prepare update data
-        update_dict = bill_data.dict(exclude_unset=True, exclude={"category_name"})
+        update_dict = bill_data.model_dump(exclude_unset=True, exclude={"category_name"})
 
         # Handle category update
         if bill_data.category_name:
-            category = expense_service.get_or_create_category(bill_data.category_name)
-            update_dict["category_id"] = category.id
+            update_dict["category_id"] = expense_service.get_or_create_category_id(bill_data.category_name)
 
         # Update bill
         bill = expense_service.update_bill(bill_id, update_dict)
@@ -197,7 +241,7 @@ async def update_bill(
         if not bill:
             raise HTTPException(status_code=404, detail="Bill not found")
 
-        return BillResponse.from_orm(bill)
+        return BillResponse.model_validate(bill)
 
     except HTTPException:
         raise
@@ -228,18 +272,22 @@ async def delete_bill(bill_id: int, db: Session = Depends(get_db)):
 @bills_router.get("/upcoming/list")
 async def get_upcoming_bills(
     days: int = Query(30, ge=1, le=365),
+    limit: int = Query(50, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
     db: Session = Depends(get_db)
 ):
     """Get upcoming bills"""
     try:
         expense_service = ExpenseService(db)
-        bills = expense_service.get_upcoming_bills(days)
+        bills = expense_service.get_upcoming_bills(days, limit=limit, offset=offset)
 
-        return {
-            "upcoming_bills": [BillResponse.model_validate(bill) for bill in bills],
-            "count": len(bills),
+        # Already serialized; returning a Response skips FastAPI's jsonable_encoder walk.
+        # "count" is the total across all pages, not the size of this one
+        return ORJSONResponse({
+            "upcoming_bills": _dump_bills(bills),
+            "count": expense_service.count_upcoming_bills(days),
             "days_ahead": days
-        }
+        })
 
     except Exception as e:
         logger.error(f"Error getting upcoming bills: {e}")
@@ -247,16 +295,20 @@ async def get_upcoming_bills(
 
 
 @bills_router.get("/overdue/list")
-async def get_overdue_bills(db: Session = Depends(get_db)):
+async def get_overdue_bills(
+    limit: int = Query(50, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_db)
+):
     """Get overdue bills"""
     try:
         expense_service = ExpenseService(db)
-        bills = expense_service.get_overdue_bills()
+        bills = expense_service.get_overdue_bills(limit=limit, offset=offset)
 
-        return {
-            "overdue_bills": [BillResponse.from_orm(bill) for bill in bills],
-            "count": len(bills)
-        }
+        return ORJSONResponse({
+            "overdue_bills": _dump_bills(bills),
+            "count": expense_service.count_overdue_bills()
+        })
 
     except Exception as e:
         logger.error(f"Error getting overdue bills: {e}")
@@ -333,7 +385,10 @@ async def get_categories(db: Session = Depends(get_db)):
         expense_service = ExpenseService(db)
         categories = expense_service.get_all_categories()
 
-        return [CategoryResponse.from_orm(category) for category in categories]
+        # response_model stays for the OpenAPI schema; returning a Response skips re-validation
+        return ORJSONResponse(_CATEGORY_LIST_ADAPTER.dump_python(
+            _CATEGORY_LIST_ADAPTER.validate_python(categories, from_attributes=True), mode="json"
+        ))
 
     except Exception as e:
         logger.error(f"Error getting categories: {e}")
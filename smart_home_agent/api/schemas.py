@@ -1,12 +1,17 @@
 """
 Pydantic schemas for API request/response validation
 """
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, StrictBool, StrictStr
 from typing import Optional, List, Dict, Any
-from datetime import date, datetime
+from datetime import date, datetime, timezone
 from enum import Enum
 
 
+def _utcnow() -> datetime:
+    """Current time as an aware UTC datetime (no local timezone lookup)"""
+    return datetime.now(timezone.utc)
+
+
 class BillStatusEnum(str, Enum):
     """Bill status options"""
     PENDING = "pending"
@@ -27,28 +32,32 @@ class BillFrequencyEnum(str, Enum):
 # Request schemas
 class CreateBillRequest(BaseModel):
     """Schema for creating a new bill"""
-    name: str = Field(..., min_length=1, max_length=200)
-    description: Optional[str] = Field(None, max_length=1000)
+    model_config = ConfigDict(extra="forbid")
+
+    name: StrictStr = Field(..., min_length=1, max_length=200)
+    description: Optional[StrictStr] = Field(None, max_length=1000)
     amount: float = Field(..., gt=0)
     due_date: date
-    category_name: str = Field(..., min_length=1, max_length=100)
-    vendor: Optional[str] = Field(None, max_length=200)
-    account_number: Optional[str] = Field(None, max_length=100)
-    notes: Optional[str] = Field(None, max_length=1000)
-    is_recurring: bool = Field(default=False)
+    category_name: StrictStr = Field(..., min_length=1, max_length=100)
+    vendor: Optional[StrictStr] = Field(None, max_length=200)
+    account_number: Optional[StrictStr] = Field(None, max_length=100)
+    notes: Optional[StrictStr] = Field(None, max_length=1000)
+    is_recurring: StrictBool = Field(default=False)
     frequency: BillFrequencyEnum = Field(default=BillFrequencyEnum.ONE_TIME)
 
 
 class UpdateBillRequest(BaseModel):
     """Schema for updating a bill"""
-    name: Optional[str] = Field(None, min_length=1, max_length=200)
-    description: Optional[str] = Field(None, max_length=1000)
+    model_config = ConfigDict(extra="forbid")
+
+    name: Optional[StrictStr] = Field(None, min_length=1, max_length=200)
+    description: Optional[StrictStr] = Field(None, max_length=1000)
     amount: Optional[float] = Field(None, gt=0)
     due_date: Optional[date] = None
-    category_name: Optional[str] = Field(None, min_length=1, max_length=100)
-    vendor: Optional[str] = Field(None, max_length=200)
-    account_number: Optional[str] = Field(None, max_length=100)
-    notes: Optional[str] = Field(None, max_length=1000)
+    category_name: Optional[StrictStr] = Field(None, min_length=1, max_length=100)
+    vendor: Optional[StrictStr] = Field(None, max_length=200)
+    account_number: Optional[StrictStr] = Field(None, max_length=100)
+    notes: Optional[StrictStr] = Field(None, max_length=1000)
     status: Optional[BillStatusEnum] = None
     frequency: Optional[BillFrequencyEnum] = None
 
@@ -75,6 +84,8 @@ class QueryBillsRequest(BaseModel):
 # Response schemas
 class CategoryResponse(BaseModel):
     """Schema for category response"""
+    model_config = ConfigDict(from_attributes=True)
+
     id: int
     name: str
     description: Optional[str]
@@ -83,12 +94,11 @@ class CategoryResponse(BaseModel):
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
-
 
 class BillResponse(BaseModel):
     """Schema for bill response"""
+    model_config = ConfigDict(from_attributes=True)
+
     id: int
     name: str
     description: Optional[str]
@@ -105,9 +115,6 @@ class BillResponse(BaseModel):
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
-
 
 class AgentResponse(BaseModel):
     """Schema for agent response"""
@@ -116,7 +123,7 @@ class AgentResponse(BaseModel):
     action_successful: bool
     session_id: str
     conversation_step: int
-    timestamp: datetime = Field(default_factory=datetime.now)
+    timestamp: datetime = Field(default_factory=_utcnow)
 
 
 class SummaryResponse(BaseModel):
@@ -160,11 +167,11 @@ class ErrorResponse(BaseModel):
     """Schema for error responses"""
     error: str
     detail: Optional[str] = None
-    timestamp: datetime = Field(default_factory=datetime.now)
+    timestamp: datetime = Field(default_factory=_utcnow)
 
 
 class SuccessResponse(BaseModel):
     """Schema for success responses"""
     message: str
     data: Optional[Any] = None
-    timestamp: datetime = Field(default_factory=datetime.now)
+    timestamp: datetime = Field(default_factory=_utcnow)
@@ -20,6 +20,11 @@ class Settings(BaseSettings):
     DB_NAME: str = Field(default="smart_home_agent")
     DB_USER: str = Field(default="postgres")
     DB_PASSWORD: str = Field(default="password")
+    # Per worker process; workers * (pool size + overflow) must stay below
+    # the server's max_connections (100 by default on PostgreSQL)
+    DB_POOL_SIZE: int = Field(default=5)
+    DB_MAX_OVERFLOW: int = Field(default=10)
+    DB_POOL_RECYCLE: int = Field(default=1800)
 
     # OpenAI
     # OPENAI_API_KEY: str = Field(default="")
@@ -32,6 +37,7 @@ class Settings(BaseSettings):
     DEBUG: bool = Field(default=True)
     LOG_LEVEL: str = Field(default="INFO")
     SECRET_KEY: str = Field(default="change-this-in-production")
+    WORKERS: int = Field(default=1)
 
     # API
     API_PREFIX: str = Field(default="/api/v1")
@@ -42,6 +48,11 @@ class Settings(BaseSettings):
     AGENT_TEMPERATURE: float = Field(default=0.1)
     MAX_CONVERSATION_HISTORY: int = Field(default=50)
 
+    # Sessions (leave REDIS_URL empty to keep sessions in process memory)
+    REDIS_URL: str = Field(default="")
+    MAX_SESSIONS: int = Field(default=10_000)
+    SESSION_TTL: int = Field(default=3600)
+
     model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding="utf-8",  # Optional, but recommended
@@ -1,10 +1,9 @@
 """
 Database configuration and session management
 """
-from sqlalchemy import create_engine, MetaData
+from sqlalchemy import create_engine, inspect, make_url, MetaData
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
-from sqlalchemy.pool import StaticPool
 from typing import Generator
 import logging
 
@@ -12,14 +11,21 @@ from .config import settings
 
 logger = logging.getLogger(__name__)
 
+# Pool sizing; SQLite (local/test setups) picks a pool that does not take these
+pool_options = {}
+if make_url(settings.DATABASE_URL).get_backend_name() != "sqlite":
+    pool_options = {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+    }
+
 # Database engine
 engine = create_engine(
     settings.DATABASE_URL,
-    # poolclass=StaticPool,
-    # pool_size=10,
-    # max_overflow=20,
-    # pool_pre_ping=True,
-    echo=settings.DEBUG
+    pool_pre_ping=True,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    echo=settings.DEBUG,
+    **pool_options
 )
 
 # Session factory
@@ -36,10 +42,17 @@ async def init_db():
     """Initialize database tables"""
     try:
         # Import all models to ensure they are registered
-        from smart_home_agent.models import bills, maintenance, categories
+        from smart_home_agent.models import bills, maintenance, categories, rollups
+
+        had_rollups = inspect(engine).has_table(rollups.MonthlyCategoryTotal.__tablename__)
 
         # Create all tables
         Base.metadata.create_all(bind=engine)
+
+        # A rollup table created next to existing bills starts out empty
+        if not had_rollups:
+            with engine.begin() as connection:
+                rollups.refresh_monthly_totals(connection)
         logger.info("Database initialized successfully")
     except Exception as e:
         logger.error(f"Failed to initialize database: {e}")
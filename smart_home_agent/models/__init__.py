@@ -5,6 +5,7 @@ from .base import BaseModel
 from .categories import Category
 from .bills import Bill, BillStatus, BillFrequency
 from .maintenance import MaintenanceTask, MaintenanceStatus, MaintenancePriority
+from .rollups import MonthlyCategoryTotal, refresh_monthly_totals
 
 __all__ = [
     "BaseModel",
@@ -14,5 +15,7 @@ __all__ = [
     "BillFrequency",
     "MaintenanceTask",
     "MaintenanceStatus",
-    "MaintenancePriority"
+    "MaintenancePriority",
+    "MonthlyCategoryTotal",
+    "refresh_monthly_totals"
 ]
@@ -1,11 +1,18 @@
 """
 Base model with common fields and utilities
 """
+from functools import lru_cache
 from sqlalchemy import Column, Integer, DateTime, String
 from sqlalchemy.sql import func
 from smart_home_agent.core.database import Base
 
 
+@lru_cache(maxsize=None)
+def _column_names(table) -> tuple:
+    """Column names of a mapped table, computed once per table"""
+    return tuple(column.name for column in table.columns)
+
+
 class BaseModel(Base):
     """Base model with common fields"""
     __abstract__ = True
@@ -16,7 +23,4 @@ class BaseModel(Base):
 
     def to_dict(self):
         """Convert model to dictionary"""
-        return {
-            column.name: getattr(self, column.name)
-            for column in self.__table__.columns
-        }
+        return {name: getattr(self, name) for name in _column_names(self.__table__)}
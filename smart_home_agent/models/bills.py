@@ -1,8 +1,8 @@
 """
 Bill and expense models
 """
-from sqlalchemy import Integer, Column, String, Numeric, Date, Text, Boolean, ForeignKey, Enum
-from sqlalchemy.orm import relationship
+from sqlalchemy import Integer, Column, String, Numeric, Date, Text, Boolean, ForeignKey, Enum, Index
+from sqlalchemy.orm import column_property, relationship
 from enum import Enum as PyEnum
 from decimal import Decimal
 from .base import BaseModel
@@ -28,18 +28,27 @@ class BillFrequency(PyEnum):
 class Bill(BaseModel):
     """Bill/Expense model"""
     __tablename__ = "bills"
+    __table_args__ = (
+        # Pending/overdue lookups filter on status and range-scan due_date
+        Index("ix_bills_status_due", "status", "due_date"),
+    )
 
     name = Column(String(200), nullable=False, index=True)
     description = Column(Text)
-    amount = Column(Numeric(10, 2), nullable=False)
-    due_date = Column(Date, nullable=False, index=True)
+    # Stored as NUMERIC, loaded as float (no per-row Decimal construction)
+    amount = Column(Numeric(10, 2, asdecimal=False), nullable=False)
+    # active_history: load the old value on assignment, even when expired,
+    # so the rollup flush hook can rebuild the month/category it left
+    due_date = column_property(Column(Date, nullable=False, index=True), active_history=True)
 
     # Status and frequency
     status = Column(Enum(BillStatus), default=BillStatus.PENDING, index=True)
     frequency = Column(Enum(BillFrequency), default=BillFrequency.ONE_TIME)
 
     # Categorization
-    category_id = Column(Integer, ForeignKey("categories.id"), nullable=False)
+    category_id = column_property(
+        Column(Integer, ForeignKey("categories.id"), nullable=False, index=True), active_history=True
+    )
 
     # Additional fields
     vendor = Column(String(200))
@@ -61,6 +70,10 @@ class Bill(BaseModel):
 
     @property
     def is_overdue(self) -> bool:
-        """Check if bill is overdue"""
+        """Check if bill is overdue
+
+        For a single loaded bill only; ExpenseService.get_overdue_bills
+        filters in SQL.
+        """
         from datetime import date
         return self.due_date < date.today() and self.status == BillStatus.PENDING
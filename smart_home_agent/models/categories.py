@@ -2,7 +2,7 @@
 Category model for expense classification
 """
 from sqlalchemy import Column, String, Text, Boolean
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, validates
 from .base import BaseModel
 
 
@@ -11,6 +11,8 @@ class Category(BaseModel):
     __tablename__ = "categories"
 
     name = Column(String(100), unique=True, nullable=False, index=True)
+    # Lowercased name; case-insensitive lookups compare against this index
+    normalized_name = Column(String(100), unique=True, nullable=False, index=True)
     description = Column(Text)
     color = Column(String(7), default="#3B82F6")  # Hex color code
     is_active = Column(Boolean, default=True)
@@ -19,5 +21,10 @@ class Category(BaseModel):
     bills = relationship("Bill", back_populates="category")
     maintenance_tasks = relationship("MaintenanceTask", back_populates="category")
 
+    @validates("name")
+    def _normalize_name(self, key, name):
+        self.normalized_name = name.lower() if name is not None else None
+        return name
+
     def __repr__(self):
         return f"<Category(name='{self.name}')>"
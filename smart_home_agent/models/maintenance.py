@@ -30,8 +30,8 @@ class MaintenanceTask(BaseModel):
 
     title = Column(String(200), nullable=False, index=True)
     description = Column(Text)
-    estimated_cost = Column(Numeric(10, 2))
-    actual_cost = Column(Numeric(10, 2))
+    estimated_cost = Column(Numeric(10, 2, asdecimal=False))
+    actual_cost = Column(Numeric(10, 2, asdecimal=False))
     scheduled_date = Column(Date, index=True)
     completed_date = Column(Date)
 
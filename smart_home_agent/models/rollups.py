@@ -0,0 +1,159 @@
+"""
+Pre-aggregated bill totals for analytics
+"""
+from datetime import date
+from itertools import chain
+from typing import Iterable, Optional, Set, Tuple
+
+from sqlalchemy import (
+    Column, Integer, Numeric, ForeignKey, UniqueConstraint, Index,
+    and_, case, cast, delete, event, extract, func, inspect, or_, select, text, tuple_
+)
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session, relationship
+
+from smart_home_agent.utils.helpers import month_bounds
+
+from .base import BaseModel
+from .bills import Bill, BillStatus
+
+# (year, month, category_id)
+RollupKey = Tuple[int, int, int]
+
+
+class MonthlyCategoryTotal(BaseModel):
+    """Bill totals per calendar month and category
+
+    Kept in sync with ``bills`` by an ``after_flush`` session hook, so
+    analytics read a few rows per month instead of every bill.
+    """
+    __tablename__ = "monthly_category_totals"
+    __table_args__ = (
+        UniqueConstraint("year", "month", "category_id", name="uq_monthly_category_totals_key"),
+        Index("ix_monthly_category_totals_category", "category_id"),
+    )
+
+    year = Column(Integer, nullable=False)
+    month = Column(Integer, nullable=False)
+    category_id = Column(Integer, ForeignKey("categories.id"), nullable=False)
+
+    total_amount = Column(Numeric(12, 2, asdecimal=False), nullable=False, default=0)
+    bill_count = Column(Integer, nullable=False, default=0)
+    paid_count = Column(Integer, nullable=False, default=0)
+    pending_count = Column(Integer, nullable=False, default=0)
+
+    # Relationships
+    category = relationship("Category")
+
+    def __repr__(self):
+        return f"<MonthlyCategoryTotal({self.year}-{self.month:02d}, category_id={self.category_id}, total={self.total_amount})>"
+
+
+def refresh_monthly_totals(connection: Connection, keys: Optional[Iterable[RollupKey]] = None) -> None:
+    """Recompute rollup rows from ``bills``
+
+    With ``keys``, only those (year, month, category_id) rows are rebuilt;
+    without, the whole table is. Call this after bulk UPDATE/DELETE
+    statements, which bypass the flush hook.
+    """
+    table = MonthlyCategoryTotal.__table__
+    year_expr = cast(extract("year", Bill.due_date), Integer)
+    month_expr = cast(extract("month", Bill.due_date), Integer)
+
+    aggregate = select(
+        year_expr,
+        month_expr,
+        Bill.category_id,
+        func.sum(Bill.amount),
+        func.count(Bill.id),
+        func.count(case((Bill.status == BillStatus.PAID, Bill.id))),
+        func.count(case((Bill.status == BillStatus.PENDING, Bill.id))),
+    ).group_by(year_expr, month_expr, Bill.category_id)
+    clear = delete(table)
+
+    if keys is not None:
+        keys = set(keys)
+        if not keys:
+            return
+        clear = clear.where(tuple_(table.c.year, table.c.month, table.c.category_id).in_(keys))
+        aggregate = aggregate.where(or_(*(
+            and_(Bill.category_id == category_id, Bill.due_date >= start, Bill.due_date <= end)
+            for year, month, category_id in keys
+            for start, end in (month_bounds(year, month),)
+        )))
+
+    # Rows whose bills are all gone must disappear, so clear then re-insert
+    stmt = insert(table).from_select(
+        ["year", "month", "category_id", "total_amount", "bill_count", "paid_count", "pending_count"],
+        aggregate
+    )
+    stmt = stmt.on_conflict_do_update(
+        constraint="uq_monthly_category_totals_key",
+        set_={
+            "total_amount": stmt.excluded.total_amount,
+            "bill_count": stmt.excluded.bill_count,
+            "paid_count": stmt.excluded.paid_count,
+            "pending_count": stmt.excluded.pending_count,
+            "updated_at": func.now(),
+        }
+    )
+    if keys is not None:
+        # Serialize rebuilds of a key until commit: otherwise two transactions
+        # adding the first bills of a key each miss the other's row, and the
+        # later upsert overwrites the total with a stale aggregate. Sorted so
+        # concurrent rebuilds take the locks in the same order.
+        for year, month, category_id in sorted(keys):
+            connection.execute(select(func.pg_advisory_xact_lock(
+                func.hashtext(f"monthly_category_totals:{year}-{month}-{category_id}")
+            )))
+    else:
+        # A full rebuild waits for, and then blocks, every keyed rebuild
+        connection.execute(text(f"LOCK TABLE {table.name} IN SHARE ROW EXCLUSIVE MODE"))
+
+    connection.execute(clear)
+    connection.execute(stmt)
+
+
+def _stored_key(bill: Bill) -> Optional[RollupKey]:
+    """Rollup key of a bill as it was loaded from the database, if any"""
+    attrs = inspect(bill).attrs
+    due_date = next(iter(attrs.due_date.history.deleted or attrs.due_date.history.unchanged), None)
+    category_id = next(iter(attrs.category_id.history.deleted or attrs.category_id.history.unchanged), None)
+    if not isinstance(due_date, date) or category_id is None:
+        return None
+    return due_date.year, due_date.month, category_id
+
+
+@event.listens_for(Session, "after_flush")
+def _refresh_after_flush(session: Session, flush_context) -> None:
+    """Rebuild the rollup rows touched by bills written in this flush"""
+    keys: Set[RollupKey] = set()
+    written_ids = set()
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if not isinstance(obj, Bill):
+            continue
+        if obj not in session.new:
+            # Key the bill counted towards before this flush
+            key = _stored_key(obj)
+            if key is not None:
+                keys.add(key)
+        if obj not in session.deleted:
+            written_ids.add(obj.id)
+
+    # Runs for every flush of every session; most touch no bills
+    if not keys and not written_ids:
+        return
+
+    connection = session.connection()
+    if written_ids:
+        # Read new keys back from the table; assigned due dates may still be strings
+        keys.update(connection.execute(
+            select(
+                cast(extract("year", Bill.due_date), Integer),
+                cast(extract("month", Bill.due_date), Integer),
+                Bill.category_id
+            ).where(Bill.id.in_(written_ids)).distinct()
+        ).tuples())
+    if keys:
+        refresh_monthly_totals(connection, keys)
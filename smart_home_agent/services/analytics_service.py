@@ -1,13 +1,13 @@
 """
 Service for analytics and reporting
 """
+import math
 from typing import Dict, Any, List
 from datetime import date, datetime, timedelta
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, desc
-from decimal import Decimal
+from sqlalchemy import func, case, tuple_
 
-from smart_home_agent.models import Bill, Category, MaintenanceTask, BillStatus
+from smart_home_agent.models import Bill, Category, MaintenanceTask, BillStatus, MonthlyCategoryTotal
 import logging
 
 logger = logging.getLogger(__name__)
@@ -26,33 +26,25 @@ class AnalyticsService:
         if month is None:
             month = date.today().month
 
-        start_date = date(year, month, 1)
-        if month == 12:
-            end_date = date(year + 1, 1, 1) - timedelta(days=1)
-        else:
-            end_date = date(year, month + 1, 1) - timedelta(days=1)
-
-        # Get bills for the month
-        bills = self.db.query(Bill).filter(
-            and_(
-                Bill.due_date >= start_date,
-                Bill.due_date <= end_date
-            )
+        # One pre-aggregated row per category for the month
+        rows = self.db.query(
+            Category.name,
+            MonthlyCategoryTotal.total_amount,
+            MonthlyCategoryTotal.bill_count,
+            MonthlyCategoryTotal.paid_count,
+            MonthlyCategoryTotal.pending_count
+        ).join(MonthlyCategoryTotal.category).filter(
+            MonthlyCategoryTotal.year == year,
+            MonthlyCategoryTotal.month == month
         ).all()
 
-        # Calculate statistics
-        total_amount = sum(float(bill.amount) for bill in bills)
-        total_bills = len(bills)
-        paid_bills = len([b for b in bills if b.status == BillStatus.PAID])
-        pending_bills = len([b for b in bills if b.status == BillStatus.PENDING])
-
-        # Category breakdown
-        category_totals = {}
-        for bill in bills:
-            category = bill.category.name
-            if category not in category_totals:
-                category_totals[category] = 0
-            category_totals[category] += float(bill.amount)
+        # Category breakdown; overall totals are sums of the category rows.
+        # NUMERIC sums arrive as floats already, converted once per group.
+        category_totals = {name: amount or 0.0 for name, amount, _, _, _ in rows}
+        total_amount = math.fsum(category_totals.values())
+        total_bills = sum(count for _, _, count, _, _ in rows)
+        paid_bills = sum(int(paid or 0) for _, _, _, paid, _ in rows)
+        pending_bills = sum(int(pending or 0) for _, _, _, _, pending in rows)
 
         return {
             "year": year,
@@ -72,30 +64,22 @@ class AnalyticsService:
         if year is None:
             year = date.today().year
 
-        start_date = date(year, 1, 1)
-        end_date = date(year, 12, 31)
-
-        bills = self.db.query(Bill).filter(
-            and_(
-                Bill.due_date >= start_date,
-                Bill.due_date <= end_date
-            )
-        ).all()
-
-        # Monthly breakdown
-        monthly_totals = {}
-        for bill in bills:
-            month = bill.due_date.month
-            if month not in monthly_totals:
-                monthly_totals[month] = 0
-            monthly_totals[month] += float(bill.amount)
+        # Monthly breakdown from the rollup
+        rows = self.db.query(
+            MonthlyCategoryTotal.month,
+            func.sum(MonthlyCategoryTotal.total_amount),
+            func.sum(MonthlyCategoryTotal.bill_count)
+        ).filter(
+            MonthlyCategoryTotal.year == year
+        ).group_by(MonthlyCategoryTotal.month).order_by(MonthlyCategoryTotal.month).all()
 
-        total_amount = sum(float(bill.amount) for bill in bills)
+        monthly_totals = {int(month): amount or 0.0 for month, amount, _ in rows}
+        total_amount = math.fsum(monthly_totals.values())
 
         return {
             "year": year,
             "total_amount": total_amount,
-            "total_bills": len(bills),
+            "total_bills": sum(int(count) for _, _, count in rows),
             "average_monthly": total_amount / 12,
             "monthly_breakdown": monthly_totals,
             "highest_month": max(monthly_totals.items(), key=lambda x: x[1]) if monthly_totals else None,
@@ -107,18 +91,19 @@ class AnalyticsService:
         # Query category totals
         category_query = self.db.query(
             Category.name,
-            func.sum(Bill.amount).label("total_amount"),
-            func.count(Bill.id).label("bill_count"),
-            func.avg(Bill.amount).label("average_amount")
-        ).join(Bill).group_by(Category.name).all()
+            func.sum(MonthlyCategoryTotal.total_amount).label("total_amount"),
+            func.sum(MonthlyCategoryTotal.bill_count).label("bill_count")
+        ).join(MonthlyCategoryTotal.category).group_by(Category.name).all()
 
         categories = []
-        for cat_name, total, count, avg in category_query:
+        for cat_name, total, count in category_query:
+            total = total or 0.0
+            count = int(count or 0)
             categories.append({
                 "name": cat_name,
-                "total_amount": float(total or 0),
-                "bill_count": count or 0,
-                "average_amount": float(avg or 0)
+                "total_amount": total,
+                "bill_count": count,
+                "average_amount": total / count if count else 0.0
             })
 
         # Sort by total amount
@@ -132,25 +117,33 @@ class AnalyticsService:
         }
 
     def get_trend_analysis(self, months: int = 6) -> Dict[str, Any]:
-        """Get spending trend analysis"""
-        end_date = date.today()
-        start_date = end_date - timedelta(days=months * 30)
-
-        bills = self.db.query(Bill).filter(
-            and_(
-                Bill.due_date >= start_date,
-                Bill.due_date <= end_date
-            )
-        ).order_by(Bill.due_date).all()
-
-        # Group by month
-        monthly_data = {}
-        for bill in bills:
-            month_key = f"{bill.due_date.year}-{bill.due_date.month:02d}"
-            if month_key not in monthly_data:
-                monthly_data[month_key] = {"amount": 0, "count": 0}
-            monthly_data[month_key]["amount"] += float(bill.amount)
-            monthly_data[month_key]["count"] += 1
+        """Get spending trend analysis over the last N calendar months
+
+        The current month counts as the last of the N.
+        """
+        today = date.today()
+        current_index = today.year * 12 + today.month - 1
+        month_index = MonthlyCategoryTotal.year * 12 + MonthlyCategoryTotal.month - 1
+
+        # Per-month totals from the rollup, oldest first
+        rows = self.db.query(
+            MonthlyCategoryTotal.year,
+            MonthlyCategoryTotal.month,
+            func.sum(MonthlyCategoryTotal.total_amount),
+            func.sum(MonthlyCategoryTotal.bill_count)
+        ).filter(
+            month_index >= current_index - (months - 1),
+            month_index <= current_index
+        ).group_by(
+            MonthlyCategoryTotal.year, MonthlyCategoryTotal.month
+        ).order_by(
+            MonthlyCategoryTotal.year, MonthlyCategoryTotal.month
+        ).all()
+
+        monthly_data = {
+            f"{year}-{month:02d}": {"amount": amount or 0.0, "count": int(count or 0)}
+            for year, month, amount, count in rows
+        }
 
         # Calculate trend
         amounts = [data["amount"] for data in monthly_data.values()]
@@ -166,45 +159,61 @@ class AnalyticsService:
             "monthly_data": monthly_data,
             "trend": trend,
             "change_percent": round(change_percent, 2),
-            "average_monthly": sum(amounts) / len(amounts) if amounts else 0
+            "average_monthly": math.fsum(amounts) / len(amounts) if amounts else 0
         }
 
     def get_comprehensive_stats(self) -> Dict[str, Any]:
-        """Get comprehensive statistics"""
-        current_month = self.get_monthly_summary()
-
-        # Last month comparison
-        last_month = date.today().replace(day=1) - timedelta(days=1)
-        last_month_summary = self.get_monthly_summary(last_month.year, last_month.month)
+        """Get comprehensive statistics
+
+        Month totals come from the rollup table and the upcoming/overdue
+        counts from one conditional-aggregate scan of pending bills.
+        """
+        today = date.today()
+        current_start = today.replace(day=1)
+        last_start = (current_start - timedelta(days=1)).replace(day=1)
+        upcoming_end = today + timedelta(days=30)
+
+        # Current and last month totals, one row each
+        month_rows = {
+            (year, month): (total or 0.0, int(count or 0), int(paid or 0))
+            for year, month, total, count, paid in self.db.query(
+                MonthlyCategoryTotal.year,
+                MonthlyCategoryTotal.month,
+                func.sum(MonthlyCategoryTotal.total_amount),
+                func.sum(MonthlyCategoryTotal.bill_count),
+                func.sum(MonthlyCategoryTotal.paid_count)
+            ).filter(
+                tuple_(MonthlyCategoryTotal.year, MonthlyCategoryTotal.month).in_([
+                    (current_start.year, current_start.month),
+                    (last_start.year, last_start.month)
+                ])
+            ).group_by(MonthlyCategoryTotal.year, MonthlyCategoryTotal.month)
+        }
+        current_total, current_bills, current_paid = month_rows.get((current_start.year, current_start.month), (0.0, 0, 0))
+        last_total = month_rows.get((last_start.year, last_start.month), (0.0, 0, 0))[0]
+
+        # Upcoming and overdue counts; both only consider pending bills
+        overdue = Bill.due_date < today
+        upcoming_count, overdue_count = self.db.query(
+            func.count(case((Bill.due_date >= today, Bill.id))),
+            func.count(case((overdue, Bill.id)))
+        ).filter(
+            Bill.status == BillStatus.PENDING,
+            Bill.due_date <= upcoming_end
+        ).one()
 
         # Category analysis
         category_analysis = self.get_category_analysis()
 
-        # Upcoming and overdue counts
-        upcoming_count = self.db.query(Bill).filter(
-            and_(
-                Bill.due_date >= date.today(),
-                Bill.due_date <= date.today() + timedelta(days=30),
-                Bill.status == BillStatus.PENDING
-            )
-        ).count()
-
-        overdue_count = self.db.query(Bill).filter(
-            and_(
-                Bill.due_date < date.today(),
-                Bill.status == BillStatus.PENDING
-            )
-        ).count()
-
         return {
-            "current_month_total": current_month["total_amount"],
-            "last_month_total": last_month_summary["total_amount"],
-            "average_monthly": (current_month["total_amount"] + last_month_summary["total_amount"]) / 2,
-            "month_over_month_change": current_month["total_amount"] - last_month_summary["total_amount"],
+            "current_month_total": current_total,
+            "last_month_total": last_total,
+            "average_monthly": (current_total + last_total) / 2,
+            "month_over_month_change": current_total - last_total,
             "top_category": category_analysis["highest_spending_category"]["name"] if category_analysis["highest_spending_category"] else "N/A",
             "total_categories": category_analysis["total_categories"],
             "upcoming_bills_count": upcoming_count,
             "overdue_bills_count": overdue_count,
-            "current_month_bills": current_month["total_bills"],
-            "payment_completion_rate": (current_month["paid_bills"] / current_month["total_bills"]) * 100 if current_month["total_bills"] > 0 else 0
+            "current_month_bills": current_bills,
+            "payment_completion_rate": (current_paid / current_bills) * 100 if current_bills > 0 else 0
         }
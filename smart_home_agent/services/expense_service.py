@@ -1,16 +1,34 @@
 """
 Service layer for expense and bill management
 """
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterable, Optional
 from datetime import date, datetime, timedelta
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, desc, asc
+from sqlalchemy.orm import Session, contains_eager, joinedload
+from sqlalchemy import and_, or_, desc, asc, delete, func, update
 
-from smart_home_agent.models import Bill, Category, BillStatus, BillFrequency
+from smart_home_agent.models import Bill, Category, BillStatus, BillFrequency, refresh_monthly_totals
+from smart_home_agent.utils.helpers import month_bounds
 import logging
+import threading
 
 logger = logging.getLogger(__name__)
 
+# Category ids by lowercased name; categories are never renamed or deleted
+_category_cache: Dict[str, int] = {}
+_category_cache_lock = threading.RLock()
+
+# Rows fetched per round trip when query results are streamed
+_STREAM_BATCH_SIZE = 1000
+
+
+def _paginate(query, limit: Optional[int], offset: int):
+    """Apply optional LIMIT/OFFSET to an ordered query"""
+    if offset:
+        query = query.offset(offset)
+    if limit is not None:
+        query = query.limit(limit)
+    return query
+
 
 class ExpenseService:
     """Service for managing expenses and bills"""
@@ -32,9 +50,26 @@ class ExpenseService:
             logger.error(f"Failed to create bill: {e}")
             raise
 
+    def create_bills_bulk(self, bills_data: List[Dict[str, Any]]) -> List[Bill]:
+        """Create many bills in one transaction
+
+        ORM inserts (rather than bulk_insert_mappings) keep the rollup
+        flush hook in play; one commit covers the whole batch.
+        """
+        try:
+            bills = [Bill(**bill_data) for bill_data in bills_data]
+            self.db.add_all(bills)
+            self.db.commit()
+            logger.info(f"Created {len(bills)} bills")
+            return bills
+        except Exception as e:
+            self.db.rollback()
+            logger.error(f"Failed to create bills: {e}")
+            raise
+
     def get_bill_by_id(self, bill_id: int) -> Optional[Bill]:
         """Get bill by ID"""
-        return self.db.query(Bill).filter(Bill.id == bill_id).first()
+        return self.db.query(Bill).options(joinedload(Bill.category)).filter(Bill.id == bill_id).first()
 
     def update_bill(self, bill_id: int, update_data: Dict[str, Any]) -> Optional[Bill]:
         """Update an existing bill"""
@@ -59,82 +94,136 @@ class ExpenseService:
     def delete_bill(self, bill_id: int) -> bool:
         """Delete a bill"""
         try:
-            bill = self.get_bill_by_id(bill_id)
-            if not bill:
+            # Single DELETE ... RETURNING; no SELECT of the full row first
+            deleted = self.db.execute(
+                delete(Bill).where(Bill.id == bill_id).returning(Bill.name, Bill.due_date, Bill.category_id)
+            ).first()
+            if deleted is None:
                 return False
 
-            self.db.delete(bill)
+            # Statement-level writes skip the flush hook that maintains the rollup
+            refresh_monthly_totals(
+                self.db.connection(), [(deleted.due_date.year, deleted.due_date.month, deleted.category_id)]
+            )
             self.db.commit()
-            logger.info(f"Deleted bill: {bill.name}")
+            logger.info(f"Deleted bill: {deleted.name}")
             return True
         except Exception as e:
             self.db.rollback()
             logger.error(f"Failed to delete bill: {e}")
             raise
 
-    def query_bills(self, filters: Dict[str, Any] = None) -> List[Bill]:
-        """Query bills with optional filters"""
+    def query_bills(
+        self, filters: Dict[str, Any] = None, limit: Optional[int] = None, offset: int = 0, stream: bool = False
+    ) -> Iterable[Bill]:
+        """Query bills with optional filters
+
+        ``limit`` and ``offset`` are applied in SQL, so only the requested
+        page is loaded. With ``stream``, an iterator fetching rows in
+        batches is returned instead of a list; consume it while the
+        session is open.
+        """
         query = self.db.query(Bill)
+        filters = filters or {}
+
+        # Load categories in the same query; BillResponse reads bill.category
+        if "category" in filters:
+            # Category filter; the join it needs also populates bill.category
+            category_name = filters["category"]
+            query = query.join(Bill.category).options(contains_eager(Bill.category)).filter(
+                Category.name.ilike(f"%{category_name}%")
+            )
+        else:
+            query = query.options(joinedload(Bill.category))
+
+        # Date range filter
+        if "date_range" in filters:
+            date_filter = filters["date_range"]
+            if isinstance(date_filter, str):
+                # Parse date string (simplified)
+                try:
+                    filter_date = datetime.strptime(date_filter, "%Y-%m-%d").date()
+                    query = query.filter(Bill.due_date == filter_date)
+                except ValueError:
+                    pass
+
+        # Status filter
+        if "status" in filters:
+            query = query.filter(Bill.status == filters["status"])
+
+        # Amount range filter
+        if "min_amount" in filters:
+            query = query.filter(Bill.amount >= filters["min_amount"])
+        if "max_amount" in filters:
+            query = query.filter(Bill.amount <= filters["max_amount"])
+
+        query = _paginate(query.order_by(desc(Bill.due_date)), limit, offset)
+        if stream:
+            return query.yield_per(_STREAM_BATCH_SIZE)
+        return query.all()
+
+    @staticmethod
+    def _upcoming_criteria(days: int):
+        """Filter for pending bills due in the next N days"""
+        today = date.today()
+        return and_(
+            Bill.due_date >= today,
+            Bill.due_date <= today + timedelta(days=days),
+            Bill.status == BillStatus.PENDING
+        )
 
-        if filters:
-            # Category filter
-            if "category" in filters:
-                category_name = filters["category"]
-                query = query.join(Category).filter(Category.name.ilike(f"%{category_name}%"))
-
-            # Date range filter
-            if "date_range" in filters:
-                date_filter = filters["date_range"]
-                if isinstance(date_filter, str):
-                    # Parse date string (simplified)
-                    try:
-                        filter_date = datetime.strptime(date_filter, "%Y-%m-%d").date()
-                        query = query.filter(Bill.due_date == filter_date)
-                    except ValueError:
-                        pass
-
-            # Status filter
-            if "status" in filters:
-                query = query.filter(Bill.status == filters["status"])
-
-            # Amount range filter
-            if "min_amount" in filters:
-                query = query.filter(Bill.amount >= filters["min_amount"])
-            if "max_amount" in filters:
-                query = query.filter(Bill.amount <= filters["max_amount"])
-
-        return query.order_by(desc(Bill.due_date)).all()
-
-    def get_upcoming_bills(self, days: int = 30) -> List[Bill]:
+    @staticmethod
+    def _overdue_criteria():
+        """Filter for pending bills past their due date"""
+        return and_(
+            Bill.due_date < date.today(),
+            Bill.status == BillStatus.PENDING
+        )
+
+    def get_upcoming_bills(self, days: int = 30, limit: Optional[int] = None, offset: int = 0) -> List[Bill]:
         """Get bills due in the next N days"""
-        end_date = date.today() + timedelta(days=days)
+        query = self.db.query(Bill).options(joinedload(Bill.category)).filter(
+            self._upcoming_criteria(days)
+        ).order_by(asc(Bill.due_date))
+        return _paginate(query, limit, offset).all()
 
-        return self.db.query(Bill).filter(
-            and_(
-                Bill.due_date >= date.today(),
-                Bill.due_date <= end_date,
-                Bill.status == BillStatus.PENDING
-            )
-        ).order_by(asc(Bill.due_date)).all()
+    def count_upcoming_bills(self, days: int = 30) -> int:
+        """Count bills due in the next N days, regardless of paging"""
+        return self.db.query(func.count(Bill.id)).filter(self._upcoming_criteria(days)).scalar()
 
-    def get_overdue_bills(self) -> List[Bill]:
+    def get_overdue_bills(self, limit: Optional[int] = None, offset: int = 0) -> List[Bill]:
         """Get overdue bills"""
-        return self.db.query(Bill).filter(
-            and_(
-                Bill.due_date < date.today(),
-                Bill.status == BillStatus.PENDING
-            )
-        ).order_by(asc(Bill.due_date)).all()
+        query = self.db.query(Bill).options(joinedload(Bill.category)).filter(
+            self._overdue_criteria()
+        ).order_by(asc(Bill.due_date))
+        return _paginate(query, limit, offset).all()
+
+    def count_overdue_bills(self) -> int:
+        """Count overdue bills, regardless of paging"""
+        return self.db.query(func.count(Bill.id)).filter(self._overdue_criteria()).scalar()
 
     def get_bills_by_category(self, category_name: str) -> List[Bill]:
         """Get bills by category name"""
-        return self.db.query(Bill).join(Category).filter(
+        return self.db.query(Bill).join(Bill.category).options(contains_eager(Bill.category)).filter(
             Category.name.ilike(f"%{category_name}%")
         ).order_by(desc(Bill.due_date)).all()
 
     def get_or_create_category(self, name: str) -> Category:
-        """Get existing category or create new one"""
-        category = self.db.query(Category).filter(Category.name.ilike(name)).first()
+        """Get existing category or create new one
+
+        Names are matched case-insensitively via ``normalized_name``.
+        Cached ids are resolved through the session identity map, so a
+        name seen before costs at most a primary-key lookup.
+        """
+        key = name.lower()
+        with _category_cache_lock:
+            category_id = _category_cache.get(key)
+        if category_id is not None:
+            category = self.db.get(Category, category_id)
+            if category is not None:
+                return category
+
+        category = self.db.query(Category).filter(Category.normalized_name == key).first()
 
         if not category:
             category = Category(name=name.title())
@@ -143,25 +232,59 @@ class ExpenseService:
             self.db.refresh(category)
             logger.info(f"Created new category: {name}")
 
+        with _category_cache_lock:
+            _category_cache[key] = category.id
+
         return category
 
+    def get_or_create_category_id(self, name: str) -> int:
+        """Return the id of the named category, creating it if needed
+
+        Ids are cached per process, so repeated names skip the database.
+        """
+        key = name.lower()
+        with _category_cache_lock:
+            category_id = _category_cache.get(key)
+        if category_id is None:
+            category_id = self.get_or_create_category(name).id
+        return category_id
+
     def get_all_categories(self) -> List[Category]:
         """Get all active categories"""
         return self.db.query(Category).filter(Category.is_active == True).all()
 
     def mark_bill_paid(self, bill_id: int) -> Optional[Bill]:
         """Mark a bill as paid"""
-        return self.update_bill(bill_id, {"status": BillStatus.PAID})
+        try:
+            # Single UPDATE ... RETURNING instead of SELECT, UPDATE, then refresh
+            bill = self.db.execute(
+                update(Bill).where(Bill.id == bill_id).values(status=BillStatus.PAID).returning(Bill)
+            ).scalar_one_or_none()
+            if bill is None:
+                return None
+
+            refresh_monthly_totals(self.db.connection(), [(bill.due_date.year, bill.due_date.month, bill.category_id)])
+            logger.info(f"Marked bill paid: {bill.name}")
+
+            # RETURNING already loaded the row; don't expire it on commit,
+            # or reading it afterwards would SELECT it again
+            expire_on_commit = self.db.expire_on_commit
+            self.db.expire_on_commit = False
+            try:
+                self.db.commit()
+            finally:
+                self.db.expire_on_commit = expire_on_commit
+            return bill
+        except Exception as e:
+            self.db.rollback()
+            logger.error(f"Failed to mark bill paid: {e}")
+            raise
 
     def get_monthly_bills(self, year: int, month: int) -> List[Bill]:
         """Get bills for a specific month"""
-        start_date = date(year, month, 1)
-        if month == 12:
-            end_date = date(year + 1, 1, 1) - timedelta(days=1)
-        else:
-            end_date = date(year, month + 1, 1) - timedelta(days=1)
+        start_date, end_date = month_bounds(year, month)
 
-        return self.db.query(Bill).filter(
+        return self.db.query(Bill).options(joinedload(Bill.category)).filter(
             and_(
                 Bill.due_date >= start_date,
                 Bill.due_date <= end_date
@@ -1,19 +1,76 @@
 """
 Utility helper functions
 """
+import binascii
+import os
 import re
-from datetime import datetime, date
-from typing import Any, Optional, Dict
+import threading
+from datetime import datetime, date, timedelta
+from functools import lru_cache
+from typing import Any, Optional, Dict, Tuple
 from decimal import Decimal, InvalidOperation
 
 
+# Random bytes for fast_uuid, fetched from os.urandom in bulk
+_ID_BUFFER_SIZE = 4096
+_id_lock = threading.Lock()
+_id_buffer = b""
+_id_offset = _ID_BUFFER_SIZE
+
+
+def _reset_id_buffer():
+    """Drop buffered bytes so a forked worker never reuses its parent's IDs"""
+    global _id_buffer, _id_offset
+    _id_buffer = b""
+    _id_offset = _ID_BUFFER_SIZE
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_id_buffer)
+
+
+def fast_uuid() -> str:
+    """Return a random version 4 UUID string
+
+    Equivalent to ``str(uuid.uuid4())`` but reads ``os.urandom`` once per
+    256 IDs instead of once per ID and skips ``uuid.UUID`` construction.
+    """
+    global _id_buffer, _id_offset
+    with _id_lock:
+        if _id_offset >= _ID_BUFFER_SIZE:
+            _id_buffer = os.urandom(_ID_BUFFER_SIZE)
+            _id_offset = 0
+        raw = _id_buffer[_id_offset:_id_offset + 16]
+        _id_offset += 16
+
+    h = binascii.hexlify(raw).decode()
+    # Set the version (4) and RFC 4122 variant bits
+    variant = "89ab"[int(h[16], 16) & 3]
+    return f"{h[:8]}-{h[8:12]}-4{h[13:16]}-{variant}{h[17:20]}-{h[20:]}"
+
+
+# Patterns used by the parsers and validators below, compiled once
+_EMAIL_RE = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+_NON_DIGIT_RE = re.compile(r'\D')
+
+_NUMERIC_TYPES = frozenset((int, float, Decimal))
+
+
 def parse_amount(amount_str: str) -> Optional[float]:
     """Parse amount string to float"""
     if not amount_str:
         return None
 
-    # Remove currency symbols and spaces
-    cleaned = re.sub(r'[\$,\s]', '', str(amount_str))
+    # Numbers need no cleaning (exact types, so bool still parses to None);
+    # the rare ones float() rejects take the string path below
+    if type(amount_str) in _NUMERIC_TYPES:
+        try:
+            return float(amount_str)
+        except (ValueError, OverflowError):
+            pass
+
+    # Remove currency symbols and spaces (split() drops the same whitespace as \s)
+    cleaned = ''.join(str(amount_str).split()).replace('$', '').replace(',', '')
 
     try:
         return float(cleaned)
@@ -21,22 +78,46 @@ def parse_amount(amount_str: str) -> Optional[float]:
         return None
 
 
+# Common date formats, in the order they are tried
+_DATE_FORMATS = (
+    "%Y-%m-%d",
+    "%m/%d/%Y",
+    "%d/%m/%Y",
+    "%Y/%m/%d",
+    "%m-%d-%Y",
+    "%d-%m-%Y"
+)
+
+# YYYY-MM-DD / YYYY/MM/DD, or MM-DD-YYYY / DD/MM/YYYY etc. (same separator twice);
+# \Z rather than $, which would also accept a trailing newline
+_DATE_RE = re.compile(
+    r"^(\d{4})([-/])(\d{1,2})\2(\d{1,2})\Z|^(\d{1,2})([-/])(\d{1,2})\6(\d{4})\Z",
+    re.ASCII
+)
+
+
 def parse_date(date_str: str) -> Optional[date]:
     """Parse date string to date object"""
     if not date_str:
         return None
 
-    # Common date formats
-    formats = [
-        "%Y-%m-%d",
-        "%m/%d/%Y",
-        "%d/%m/%Y",
-        "%Y/%m/%d",
-        "%m-%d-%Y",
-        "%d-%m-%Y"
-    ]
-
-    for fmt in formats:
+    # Fast path: build the date straight from the regex groups
+    match = _DATE_RE.match(date_str)
+    if match:
+        year, _, month, day, first, _, second, year_last = match.groups()
+        if year:
+            candidates = ((int(year), int(month), int(day)),)
+        else:
+            # Month first, then day first, as in _DATE_FORMATS
+            candidates = ((int(year_last), int(first), int(second)), (int(year_last), int(second), int(first)))
+        for args in candidates:
+            try:
+                return date(*args)
+            except ValueError:
+                continue
+        return None
+
+    for fmt in _DATE_FORMATS:
         try:
             return datetime.strptime(date_str, fmt).date()
         except ValueError:
@@ -45,6 +126,13 @@ def parse_date(date_str: str) -> Optional[date]:
     return None
 
 
+@lru_cache(maxsize=512)
+def month_bounds(year: int, month: int) -> Tuple[date, date]:
+    """First and last day of a calendar month"""
+    next_year, next_month = divmod(year * 12 + month, 12)
+    return date(year, month, 1), date(next_year, next_month + 1, 1) - timedelta(days=1)
+
+
 def format_currency(amount: float, currency: str = "$") -> str:
     """Format amount as currency"""
     try:
@@ -68,44 +156,62 @@ def sanitize_string(text: str, max_length: int = None) -> str:
     return sanitized
 
 
+# Category keywords; earlier categories win when several match
+CATEGORY_PATTERNS: Dict[str, Tuple[str, ...]] = {
+    "utilities": ("electric", "electricity", "gas", "water", "sewer", "utilities"),
+    "subscriptions": ("netflix", "spotify", "subscription", "streaming", "amazon prime"),
+    "maintenance": ("maintenance", "repair", "hvac", "plumbing", "electrician"),
+    "insurance": ("insurance", "policy", "coverage"),
+    "rent": ("rent", "mortgage", "housing"),
+    "internet": ("internet", "cable", "wifi", "broadband"),
+    "transportation": ("car", "auto", "gas", "fuel", "parking", "uber", "lyft")
+}
+
+_CATEGORY_TITLES = tuple(category.title() for category in CATEGORY_PATTERNS)
+
+# Keyword -> index of the first category that lists it
+_KEYWORD_PRIORITY: Dict[str, int] = {}
+for _index, _patterns in enumerate(CATEGORY_PATTERNS.values()):
+    for _pattern in _patterns:
+        _KEYWORD_PRIORITY.setdefault(_pattern, _index)
+
+# Zero-width lookahead so overlapping keywords are all seen in one scan;
+# alternatives are ordered by priority, so at any position the best keyword wins
+_CATEGORY_SCAN_RE = re.compile(
+    "(?=(" + "|".join(re.escape(k) for k in sorted(_KEYWORD_PRIORITY, key=_KEYWORD_PRIORITY.get)) + "))"
+)
+
+
 def extract_category_from_text(text: str) -> Optional[str]:
     """Extract category from text using patterns"""
-    text_lower = text.lower()
-
-    # Category mapping
-    category_patterns = {
-        "utilities": ["electric", "electricity", "gas", "water", "sewer", "utilities"],
-        "subscriptions": ["netflix", "spotify", "subscription", "streaming", "amazon prime"],
-        "maintenance": ["maintenance", "repair", "hvac", "plumbing", "electrician"],
-        "insurance": ["insurance", "policy", "coverage"],
-        "rent": ["rent", "mortgage", "housing"],
-        "internet": ["internet", "cable", "wifi", "broadband"],
-        "transportation": ["car", "auto", "gas", "fuel", "parking", "uber", "lyft"]
-    }
-
-    for category, patterns in category_patterns.items():
-        if any(pattern in text_lower for pattern in patterns):
-            return category.title()
+    best = None
+    for match in _CATEGORY_SCAN_RE.finditer(text.lower()):
+        priority = _KEYWORD_PRIORITY[match.group(1)]
+        if best is None or priority < best:
+            best = priority
+            if best == 0:
+                break
 
-    return None
+    return _CATEGORY_TITLES[best] if best is not None else None
 
 
+@lru_cache(maxsize=4096)
 def validate_email(email: str) -> bool:
     """Validate email address"""
     if not email:
         return False
 
-    pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    return bool(re.match(pattern, email))
+    return bool(_EMAIL_RE.match(email))
 
 
+@lru_cache(maxsize=4096)
 def validate_phone(phone: str) -> bool:
     """Validate phone number"""
     if not phone:
         return False
 
     # Remove all non-digit characters
-    digits = re.sub(r'\D', '', phone)
+    digits = _NON_DIGIT_RE.sub('', phone)
 
     # Check if it's a valid US phone number (10 or 11 digits)
     return len(digits) in [10, 11]
@@ -119,22 +225,36 @@ def truncate_text(text: str, max_length: int, suffix: str = "...") -> str:
     return text[:max_length - len(suffix)] + suffix
 
 
-def safe_float_conversion(value: Any) -> float:
-    """Safely convert value to float"""
-    if value is None:
+def _str_to_float(value: str) -> float:
+    try:
+        return float(value.replace(',', ''))
+    except ValueError:
         return 0.0
 
-    if isinstance(value, (int, float)):
-        return float(value)
 
-    if isinstance(value, Decimal):
+# Exact-type handlers for safe_float_conversion; one dict lookup per call
+_FLOAT_CONVERTERS = {
+    float: float,
+    int: float,
+    bool: float,
+    Decimal: float,
+    str: _str_to_float,
+    type(None): lambda _: 0.0,
+}
+
+
+def safe_float_conversion(value: Any) -> float:
+    """Safely convert value to float"""
+    converter = _FLOAT_CONVERTERS.get(type(value))
+    if converter is not None:
+        return converter(value)
+
+    # Subclasses (e.g. IntEnum, numpy floats) take the isinstance path
+    if isinstance(value, (int, float, Decimal)):
         return float(value)
 
     if isinstance(value, str):
-        try:
-            return float(value.replace(',', ''))
-        except ValueError:
-            return 0.0
+        return _str_to_float(value)
 
     return 0.0
 
@@ -149,18 +269,22 @@ def generate_bill_summary(bills: list) -> Dict[str, Any]:
             "categories": {}
         }
 
-    total_amount = sum(safe_float_conversion(bill.get("amount", 0)) for bill in bills)
-    count = len(bills)
-    average_amount = total_amount / count if count > 0 else 0.0
-
-    # Category breakdown
+    # Totals and category breakdown in one pass
+    total_amount = 0.0
     categories = {}
     for bill in bills:
-        category = bill.get("category", {}).get("name", "Unknown")
-        if category not in categories:
-            categories[category] = {"count": 0, "amount": 0.0}
-        categories[category]["count"] += 1
-        categories[category]["amount"] += safe_float_conversion(bill.get("amount", 0))
+        amount = safe_float_conversion(bill.get("amount", 0))
+        total_amount += amount
+
+        category = (bill.get("category") or {}).get("name", "Unknown")
+        entry = categories.get(category)
+        if entry is None:
+            entry = categories[category] = {"count": 0, "amount": 0.0}
+        entry["count"] += 1
+        entry["amount"] += amount
+
+    count = len(bills)
+    average_amount = total_amount / count if count > 0 else 0.0
 
     return {
         "total_amount": total_amount,
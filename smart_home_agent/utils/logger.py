@@ -2,12 +2,23 @@
 Logging configuration for the application
 """
 import logging
+import queue
 import sys
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
+from typing import Optional
+
+# Background thread that writes queued records to the real handlers
+_listener: Optional[QueueListener] = None
 
 
 def setup_logging(log_level: str = "INFO", log_file: str = None):
-    """Setup application logging"""
+    """Setup application logging
+
+    Loggers only enqueue records; a ``QueueListener`` thread does the
+    formatting and stream/file writes so request handlers never block on I/O.
+    """
+    global _listener
 
     # Create logs directory if it doesn't exist
     if log_file:
@@ -25,22 +36,37 @@ def setup_logging(log_level: str = "INFO", log_file: str = None):
     root_logger.setLevel(getattr(logging, log_level.upper()))
 
     # Clear existing handlers
+    shutdown_logging()
     root_logger.handlers.clear()
 
     # Console handler
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setFormatter(formatter)
-    root_logger.addHandler(console_handler)
+    handlers = [console_handler]
 
     # File handler (if specified)
     if log_file:
         file_handler = logging.FileHandler(log_file)
         file_handler.setFormatter(formatter)
-        root_logger.addHandler(file_handler)
+        handlers.append(file_handler)
+
+    # Route all records through a queue drained on a background thread
+    log_queue = queue.SimpleQueue()
+    root_logger.addHandler(QueueHandler(log_queue))
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
 
     # Set specific logger levels
     logging.getLogger("uvicorn").setLevel(logging.INFO)
     logging.getLogger("sqlalchemy.engine").setLevel(logging.WARNING)
     logging.getLogger("httpx").setLevel(logging.WARNING)
 
-    logging.info(f"Logging configured with level: {log_level}")
+    logging.info("Logging configured with level: %s", log_level)
+
+
+def shutdown_logging():
+    """Flush queued records and stop the listener thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None